@@ -0,0 +1,49 @@
+"""
+version async de cualquier repositorio hecho con los mixins de repository.py
+
+los almacenes que bloquean en E/S (sqlite, el WAL con fsync) declaran
+blocking_io = True y sus llamadas se mandan a un hilo con to_thread, asi
+el bucle de eventos sigue atendiendo otras peticiones; los que viven en
+memoria se llaman directamente, un hilo costaria mas que la operacion
+"""
+import asyncio
+from typing import Protocol
+
+
+class AsyncRepositoryProtocol(Protocol):
+    async def add(self, entity): ...
+    async def find(self, id, message="La entidad no existe"): ...
+    async def update(self, entity): ...
+    async def remove(self, entity): ...
+    async def query(self, predicate, page=0, size=10): ...
+
+
+class AsyncRepository:
+    def __init__(self, repository, blocking_io=None):
+        self._repository = repository
+        if blocking_io is None:
+            blocking_io = getattr(repository, "blocking_io", False)
+        self._blocking_io = blocking_io
+
+    async def add(self, entity):
+        return await self._call(self._repository.add, entity)
+
+    async def add_many(self, entities):
+        return await self._call(self._repository.add_many, entities)
+
+    async def find(self, id, message="La entidad no existe"):
+        return await self._call(self._repository.find, id, message)
+
+    async def update(self, entity):
+        return await self._call(self._repository.update, entity)
+
+    async def remove(self, entity):
+        return await self._call(self._repository.remove, entity)
+
+    async def query(self, predicate, page=0, size=10):
+        return await self._call(self._repository.query, predicate, page, size)
+
+    async def _call(self, method, *args):
+        if self._blocking_io:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
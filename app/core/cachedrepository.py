@@ -0,0 +1,83 @@
+"""
+cache de lectura delante de cualquier repositorio hecho con los mixins
+
+find pasa por un LRU acotado con TTL opcional; update y remove invalidan
+la entrada y el resto de metodos (add, query, scan...) van directos al
+repositorio envuelto
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class CachedRepository:
+    def __init__(self, repository, max_size=10_000, ttl=None, clock=time.monotonic):
+        self._repository = repository
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # sube con cada invalidacion: un find que empezo antes no debe
+        # guardar en cache lo que leyo
+        self._generation = 0
+
+    def find(self, id, message="La entidad no existe"):
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(id)
+            if entry is not None:
+                entity, expires = entry
+                if expires is None or expires > now:
+                    self._entries.move_to_end(id)
+                    self.hits += 1
+                    return entity
+                del self._entries[id]
+            self.misses += 1
+            generation = self._generation
+        # fuera del lock: un almacen lento no bloquea a los que aciertan
+        entity = self._repository.find(id, message)
+        with self._lock:
+            if generation != self._generation:
+                return entity
+            self._entries[id] = (entity, None if self._ttl is None else now + self._ttl)
+            self._entries.move_to_end(id)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entity
+
+    def update(self, entity):
+        try:
+            self._repository.update(entity)
+        finally:
+            self.invalidate(entity.id)
+
+    def remove(self, entity):
+        try:
+            self._repository.remove(entity)
+        finally:
+            self.invalidate(entity.id)
+
+    def invalidate(self, id=None):
+        with self._lock:
+            self._generation += 1
+            if id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(id, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def __getattr__(self, name):
+        return getattr(self._repository, name)
@@ -9,3 +9,10 @@ class CustomBaseModel(BaseModel):
     def model_dump_json(self, *args, **kwargs):
         kwargs.setdefault("exclude_none", True)
         return super().model_dump_json(*args, **kwargs)
+    @classmethod
+    def trusted(cls, **data):
+        """
+        construye sin validar: solo para datos que ya son validos, como los
+        que salen de una entidad del dominio al montar la respuesta
+        """
+        return cls.model_construct(**data)
@@ -1,4 +1,18 @@
 from app.core.entitybase import EntityBase
 class Data:
-    def __init__(self, data:set[EntityBase]):
-        self.data = data
\ No newline at end of file
+    def __init__(self, data:set[EntityBase], indexes=None):
+        self.data = data
+        # indice por id para que find no recorra todo el set
+        self.index = {entity.id: entity for entity in data}
+        # indices secundarios por atributo (HashIndex, SortedIndex)
+        self.indexes = indexes or {}
+        for secondary in self.indexes.values():
+            secondary.add_many(data)
+    def _check(self, entities):
+        # antes de tocar nada: un indice que no puede guardar una entidad
+        # (p.ej. un coste NaN en un SortedIndex) la rechaza aqui con ValueError
+        for secondary in self.indexes.values():
+            check = getattr(secondary, "check", None)
+            if check is not None:
+                for entity in entities:
+                    check(entity)
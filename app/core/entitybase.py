@@ -10,11 +10,22 @@
 from abc import ABC
 
 class EntityBase(ABC):
-    def __init__(self, id):
+    # sin __dict__ por instancia, ahorra memoria con millones de entidades
+    __slots__ = ("_id", "_version")
+
+    def __init__(self, id, version=0):
         self._id = id
+        self._version = version
     @property
     def id(self):
         return self._id
+    @property
+    def version(self):
+        # la sube repository.update, sirve de ETag
+        return self._version
+    def bump_version(self, version=None):
+        # los almacenes con su propio contador pasan la version que tienen
+        self._version = self._version + 1 if version is None else version
     def __eq__(self, value):
         if not isinstance(value, EntityBase):
             return False
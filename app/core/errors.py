@@ -1,5 +1,6 @@
 from flask import Flask, jsonify
 from app.core.notfoundexception import NotFoundException
+from app.core.storagelimitexception import StorageLimitException
 def error_handlers(app:Flask):
       @app.errorhandler(NotFoundException)
       def not_found_exception_handler(e:NotFoundException): 
@@ -7,3 +8,11 @@ def error_handlers(app:Flask):
                   "message" :e.message
             }
             return jsonify(response), e.code
+
+      @app.errorhandler(StorageLimitException)
+      def storage_limit_exception_handler(e:StorageLimitException):
+            # p.ej. un nombre que no cabe en la memoria compartida
+            response = {
+                  "message" :e.message
+            }
+            return jsonify(response), e.code
@@ -0,0 +1,137 @@
+"""
+indices secundarios que mantiene el repositorio en add/update/remove
+
+cada indice guarda la clave actual de cada entidad por id, porque las
+entidades se modifican en el sitio (Ingredient.update) antes de llamar
+a repository.update y sin ella no sabriamos que clave borrar
+"""
+from operator import itemgetter
+from app.core.sortedlist import SortedList
+
+
+class HashIndex:
+    """igualdad exacta sobre un atributo"""
+    def __init__(self, field):
+        self.field = field
+        self._keys = {}
+        self._buckets = {}
+
+    def add(self, entity):
+        key = getattr(entity, self.field)
+        self._keys[entity.id] = key
+        self._buckets.setdefault(key, set()).add(entity.id)
+
+    def add_many(self, entities):
+        # lo mismo que add en bucle, sin una llamada por entidad
+        keys, buckets, field = self._keys, self._buckets, self.field
+        for entity in entities:
+            id, key = entity.id, getattr(entity, field)
+            keys[id] = key
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = {id}
+            else:
+                bucket.add(id)
+
+    def remove(self, entity):
+        key = self._keys.pop(entity.id, None)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return
+        bucket.discard(entity.id)
+        if not bucket:
+            del self._buckets[key]
+
+    def update(self, entity):
+        if self._keys.get(entity.id, self) == getattr(entity, self.field):
+            return
+        self.remove(entity)
+        self.add(entity)
+
+    def supports(self, predicate):
+        return predicate.op == "eq"
+
+    def ids(self, predicate):
+        return iter(self._buckets.get(predicate.value, ()))
+
+
+class SortedIndex:
+    """igualdad, rangos y prefijos sobre un atributo ordenable"""
+    def __init__(self, field):
+        self.field = field
+        self._keys = {}
+        # (clave, id): los empates se ordenan por id y cada entrada es unica
+        self._entries = SortedList()
+
+    def check(self, entity):
+        # NaN no es igual a si mismo y rompe el bisect: una vez dentro, remove
+        # no encuentra otras entradas
+        key = getattr(entity, self.field)
+        if key != key:
+            raise ValueError(f"{self.field} no se puede ordenar: {key}")
+
+    def add(self, entity):
+        self.check(entity)
+        key = getattr(entity, self.field)
+        self._keys[entity.id] = key
+        self._entries.add((key, entity.id))
+
+    def add_many(self, entities, order=None):
+        # un solo sort en vez de un add por entidad; order son las posiciones
+        # de entities en orden (clave, id), p.ej. las de un snapshot, y con
+        # el no hace falta ordenar
+        field = self.field
+        entries = []
+        for entity in entities:
+            key = getattr(entity, field)
+            if key != key:
+                self.check(entity)
+            entries.append((key, entity.id))
+        self._keys.update((id, key) for key, id in entries)
+        if order is not None:
+            entries = map(entries.__getitem__, order)
+        self._entries.update(entries, order is not None)
+
+    def remove(self, entity):
+        if entity.id not in self._keys:
+            return
+        self._entries.remove((self._keys.pop(entity.id), entity.id))
+
+    def update(self, entity):
+        if self._keys.get(entity.id, self) == getattr(entity, self.field):
+            return
+        self.check(entity)
+        self.remove(entity)
+        self.add(entity)
+
+    def supports(self, predicate):
+        return predicate.op in ("eq", "range", "prefix")
+
+    def ids(self, predicate):
+        # comparamos solo la clave para no depender del orden de los ids
+        if predicate.op == "eq":
+            entries = self._entries.irange(predicate.value, predicate.value, key=_key)
+        elif predicate.op == "prefix":
+            entries = self._entries.irange(
+                predicate.value, predicate.value + "\U0010ffff", (True, False), key=_key
+            )
+        else:
+            entries = self._entries.irange(predicate.low, predicate.high, key=_key)
+        return map(_id, entries)
+
+    def ids_after(self, key=None, id=None):
+        """
+        keyset: ids con clave estrictamente mayor que la del cursor; con id
+        continua justo detras de (clave, id), asi no se saltan los empates
+        """
+        if key is None:
+            entries = iter(self._entries)
+        elif id is None:
+            entries = self._entries.irange(key, inclusive=(False, True), key=_key)
+        else:
+            entries = self._entries.irange((key, id), inclusive=(False, True))
+        return map(_id, entries)
+
+
+_key = itemgetter(0)
+_id = itemgetter(1)
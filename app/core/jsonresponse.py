@@ -0,0 +1,11 @@
+from flask import Response
+from pydantic import BaseModel
+
+
+def json_response(model: BaseModel, status=200, headers=None) -> Response:
+    """
+    escribe el modelo como bytes json con el serializador de pydantic-core,
+    sin pasar por dict + jsonify ni por la conversion de flask_pydantic
+    """
+    return Response(model.model_dump_json(), status=status, headers=headers,
+                    mimetype="application/json")
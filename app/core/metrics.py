@@ -0,0 +1,103 @@
+"""
+metricas en memoria con formato de texto de Prometheus
+
+los histogramas tienen cubos fijos, asi la memoria no crece con el trafico;
+las etiquetas salen del url_map (endpoint), del metodo y del status, que
+tambien son finitos
+"""
+import threading
+import time
+from bisect import bisect_left
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        # counts no es acumulado, se acumula al exportar
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, name, labels: tuple, value):
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name, labels: tuple, value=1):
+        with self._lock:
+            self._counters[(name, labels)] = self._counters.get((name, labels), 0) + value
+
+    def render(self):
+        lines = []
+        with self._lock:
+            types = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in types:
+                    types.add(name)
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name}{_labels(labels)} {value}")
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                if name not in types:
+                    types.add(name)
+                    lines.append(f"# TYPE {name} histogram")
+                total = 0
+                for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+                    total += count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {total}")
+                lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+registry = Registry()
+
+
+class MeteredRepository:
+    """mide find, query, add y el resto de operaciones del repositorio envuelto"""
+    OPERATIONS = {"add", "add_many", "find", "update", "remove", "query"}
+
+    def __init__(self, repository, name, registry=registry):
+        self._repository = repository
+        self._name = name
+        self._registry = registry
+
+    def __getattr__(self, name):
+        attribute = getattr(self._repository, name)
+        if name not in self.OPERATIONS:
+            return attribute
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                self._registry.observe(
+                    "repository_operation_duration_seconds",
+                    (("repository", self._name), ("operation", name)),
+                    time.perf_counter() - start,
+                )
+        # la siguiente vez se encuentra en la instancia sin pasar por aqui
+        setattr(self, name, timed)
+        return timed
@@ -0,0 +1,56 @@
+"""
+predicados estructurados para repository.query
+
+son invocables como una lambda, asi que funcionan igual sin indices,
+pero el planificador de Query puede resolverlos con un indice secundario
+"""
+
+
+class Eq:
+    op = "eq"
+
+    def __init__(self, field, value):
+        self.field = field
+        self.value = value
+
+    def __call__(self, entity):
+        return getattr(entity, self.field) == self.value
+
+
+class Range:
+    """low <= valor <= high, None deja el extremo abierto"""
+    op = "range"
+
+    def __init__(self, field, low=None, high=None):
+        self.field = field
+        self.low = low
+        self.high = high
+
+    def __call__(self, entity):
+        value = getattr(entity, self.field)
+        if self.low is not None and value < self.low:
+            return False
+        if self.high is not None and value > self.high:
+            return False
+        return True
+
+
+class Prefix:
+    op = "prefix"
+
+    def __init__(self, field, value):
+        self.field = field
+        self.value = value
+
+    def __call__(self, entity):
+        return getattr(entity, self.field).startswith(self.value)
+
+
+class And:
+    op = "and"
+
+    def __init__(self, *predicates):
+        self.predicates = predicates
+
+    def __call__(self, entity):
+        return all(predicate(entity) for predicate in self.predicates)
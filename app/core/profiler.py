@@ -0,0 +1,187 @@
+"""
+perfilado bajo demanda de las siguientes N peticiones a un endpoint
+
+    POST   /debug/profile/<endpoint>?requests=20&mode=cprofile|sample
+    GET    /debug/profile/<endpoint>?format=pstats|collapsed
+    DELETE /debug/profile/<endpoint>
+
+solo existe si se arranca con PROFILING=1, y aun asi no hay ningun hook
+por peticion: al armar un endpoint se sustituye su vista en
+app.view_functions por una que perfila, y al completar las N peticiones
+se vuelve a poner la original
+
+mode=cprofile agrega pstats; mode=sample toma muestras de la pila del
+hilo de la peticion y las devuelve en formato collapsed (una linea
+"a;b;c N" por pila), que leen flamegraph.pl o speedscope
+"""
+import cProfile
+import inspect
+import io
+import pstats
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from flask import Flask, Response, abort, request
+
+
+class Sampler:
+    def __init__(self, thread_id, counts: Counter, interval=0.001):
+        self._thread_id = thread_id
+        self._counts = counts
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self._counts[";".join(reversed(stack))] += 1
+
+
+class RouteProfiler:
+    def __init__(self, app: Flask):
+        self._app = app
+        self._lock = threading.Lock()
+        self._originals = {}
+        self._remaining = {}
+        self._modes = {}
+        self._stats = {}
+        self._stacks = {}
+
+    def arm(self, endpoint, requests=10, mode="cprofile"):
+        if endpoint not in self._app.view_functions:
+            raise KeyError(endpoint)
+        with self._lock:
+            self._stats[endpoint] = None
+            self._stacks[endpoint] = Counter()
+            self._remaining[endpoint] = requests
+            self._modes[endpoint] = mode
+            if endpoint not in self._originals:
+                original = self._app.view_functions[endpoint]
+                self._originals[endpoint] = original
+                self._app.view_functions[endpoint] = self._wrap(endpoint, original)
+
+    def disarm(self, endpoint):
+        with self._lock:
+            original = self._originals.pop(endpoint, None)
+            self._remaining.pop(endpoint, None)
+            if original is not None:
+                self._app.view_functions[endpoint] = original
+
+    def report(self, endpoint, format="pstats"):
+        with self._lock:
+            if format == "collapsed":
+                counts = self._stacks.get(endpoint) or Counter()
+                return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                return ""
+            stream = io.StringIO()
+            stats.stream = stream
+            stats.sort_stats("cumulative").print_stats(50)
+            return stream.getvalue()
+
+    def _wrap(self, endpoint, view):
+        # una peticion perfilada a la vez; el resto pasa sin perfilar
+        busy = threading.Lock()
+
+        @contextmanager
+        def session():
+            if not busy.acquire(blocking=False):
+                yield
+                return
+            try:
+                with self._record(endpoint):
+                    yield
+            finally:
+                busy.release()
+                self._count(endpoint)
+
+        if inspect.iscoroutinefunction(view):
+            async def profiled(**kwargs):
+                with session():
+                    return await view(**kwargs)
+        else:
+            def profiled(**kwargs):
+                with session():
+                    return view(**kwargs)
+        profiled.__name__ = view.__name__
+        return profiled
+
+    @contextmanager
+    def _record(self, endpoint):
+        mode = self._modes[endpoint]
+        if mode == "sample":
+            counts = Counter()
+            sampler = Sampler(threading.get_ident(), counts)
+            sampler.start()
+            try:
+                yield
+            finally:
+                sampler.stop()
+                with self._lock:
+                    self._stacks[endpoint].update(counts)
+        else:
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                with self._lock:
+                    if self._stats[endpoint] is None:
+                        self._stats[endpoint] = pstats.Stats(profile)
+                    else:
+                        self._stats[endpoint].add(profile)
+
+    def _count(self, endpoint):
+        with self._lock:
+            if endpoint not in self._remaining:
+                return
+            self._remaining[endpoint] -= 1
+            done = self._remaining[endpoint] <= 0
+        if done:
+            self.disarm(endpoint)
+
+
+def profiling(app: Flask, enabled=False):
+    if not enabled:
+        return None
+    profiler = RouteProfiler(app)
+
+    @app.route("/debug/profile/<endpoint>", methods=["POST"])
+    def arm_profile(endpoint):
+        mode = request.args.get("mode", "cprofile")
+        if mode not in ("cprofile", "sample"):
+            abort(400)
+        try:
+            profiler.arm(endpoint, request.args.get("requests", 10, type=int), mode)
+        except KeyError:
+            abort(404)
+        return "", 202
+
+    @app.route("/debug/profile/<endpoint>", methods=["GET"])
+    def read_profile(endpoint):
+        return Response(profiler.report(endpoint, request.args.get("format", "pstats")),
+                        mimetype="text/plain")
+
+    @app.route("/debug/profile/<endpoint>", methods=["DELETE"])
+    def disarm_profile(endpoint):
+        profiler.disarm(endpoint)
+        return "", 204
+
+    return profiler
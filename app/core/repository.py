@@ -1,23 +1,132 @@
+from itertools import islice
+from app.core.rwlock import RWLock
 from app.core.data import Data
 from app.core.entitybase import EntityBase
 from app.core.notfoundexception import NotFoundException
 
 class Add(Data):
+    # un id que ya esta se ignora, como INSERT OR IGNORE en sqlite; para
+    # cambiar una entidad existente esta update. add_many devuelve cuantas
+    # ha insertado de verdad
     def add(self,entity:EntityBase):
-        self.data.add(entity)        
+        if entity.id in self.index:
+            return
+        self._check([entity])
+        self.data.add(entity)
+        self.index[entity.id] = entity
+        for secondary in self.indexes.values():
+            secondary.add(entity)
+    def add_many(self, entities:list[EntityBase]):
+        new = {}
+        for entity in entities:
+            if entity.id not in self.index:
+                new.setdefault(entity.id, entity)
+        entities = list(new.values())
+        self._check(entities)
+        self.data.update(entities)
+        self.index.update((entity.id, entity) for entity in entities)
+        for secondary in self.indexes.values():
+            secondary.add_many(entities)
+        return len(entities)
 class Get(Data):
     def find(self,id, message="La entidad no existe"):
-         entity = next((e for e in self.data if e.id == id), None)       
+         entity = self.index.get(id)
          if entity is None:
             raise NotFoundException(message)
          return entity
 class Update(Get):
-    def update(self,entity:EntityBase):        
+    def update(self,entity:EntityBase):
+        # la version sale de la guardada: la instancia que llega puede ser
+        # nueva (Ingredient(id, ...)) y empezar en 0
+        version = self.index[entity.id].version + 1
+        self.replace(entity)
+        entity.bump_version(version)
+    def replace(self,entity:EntityBase):
+        # como update pero sin subir la version, para reconstruir desde un log
+        self._check([entity])
         self.data.remove(entity)
         self.data.add(entity)
+        self.index[entity.id] = entity
+        for secondary in self.indexes.values():
+            secondary.update(entity)
 class Remove(Get):
     def remove(self,entity):
+        # primero los indices: si uno falla, data e index siguen intactos
+        for secondary in self.indexes.values():
+            secondary.remove(entity)
         self.data.remove(entity)
+        del self.index[entity.id]
+class Query(Data):
+    def query(self, predicate, page=0, size=10):
+        start_index = page * size
+        return list(islice(self._plan(predicate), start_index, start_index + size))
+
+    def scan(self, after=None, predicate=None, field="id", after_id=None):
+        # generador ordenado por un SortedIndex, se detiene cuando el que
+        # lo consume deja de pedir, asi la pagina N cuesta lo mismo que la 1;
+        # con after_id sigue justo detras de (after, after_id), para campos
+        # con valores repetidos
+        for id in self.indexes[field].ids_after(after, after_id):
+            entity = self.index[id]
+            if predicate is None or predicate(entity):
+                yield entity
+
+    def _plan(self, predicate):
+        # si algun predicado estructurado tiene indice lo usamos para
+        # obtener los candidatos y filtramos el resto; si no, recorremos todo
+        predicates = getattr(predicate, "predicates", (predicate,))
+        for candidate in predicates:
+            secondary = self.indexes.get(getattr(candidate, "field", None))
+            if secondary is not None and secondary.supports(candidate):
+                rest = [p for p in predicates if p is not candidate]
+                entities = (self.index[id] for id in secondary.ids(candidate))
+                return (e for e in entities if all(p(e) for p in rest))
+        return (item for item in self.data if predicate(item))
+class Synchronized(Data):
+    """
+    se pone delante de los otros mixins en la herencia:
+        class X(Synchronized, Add, Update, Remove, Query)
+    las lecturas comparten el lock y add/update/remove lo toman en
+    exclusiva, asi update (remove + add) es atomico
+    """
+    SCAN_CHUNK = 64
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = RWLock()
+
+    def add(self, entity):
+        with self.lock.write():
+            super().add(entity)
+
+    def add_many(self, entities):
+        with self.lock.write():
+            return super().add_many(entities)
+
+    def update(self, entity):
+        with self.lock.write():
+            super().update(entity)
+
+    def remove(self, entity):
+        with self.lock.write():
+            super().remove(entity)
+
+    def find(self, id, message="La entidad no existe"):
+        with self.lock.read():
+            return super().find(id, message)
 
+    def query(self, predicate, page=0, size=10):
+        with self.lock.read():
+            return super().query(predicate, page, size)
 
-        
\ No newline at end of file
+    def scan(self, after=None, predicate=None, field="id", after_id=None):
+        # no se puede tener el lock mientras el consumidor itera, asi que
+        # leemos por bloques y continuamos desde (clave, id) del ultimo: solo
+        # con la clave se saltarian los empates de un campo no unico
+        while True:
+            with self.lock.read():
+                chunk = list(islice(super().scan(after, predicate, field, after_id), self.SCAN_CHUNK))
+            yield from chunk
+            if len(chunk) < self.SCAN_CHUNK:
+                return
+            after, after_id = getattr(chunk[-1], field), chunk[-1].id
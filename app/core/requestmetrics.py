@@ -0,0 +1,42 @@
+"""
+middleware que mide cada peticion y publica el registro en /metrics
+"""
+import time
+from flask import Flask, Response, g, request
+from app.core.metrics import registry as default_registry
+
+
+def metrics(app: Flask, registry=default_registry):
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record(response):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return response
+        endpoint = request.endpoint or "none"
+
+        def observe():
+            registry.observe(
+                "http_request_duration_seconds", (("endpoint", endpoint),), time.perf_counter() - start
+            )
+
+        # en streaming (p.ej. /ingredients/export) el cuerpo se genera despues
+        # de la vista: se mide cuando el servidor cierra la respuesta
+        if response.is_streamed:
+            response.call_on_close(observe)
+        else:
+            observe()
+        registry.inc(
+            "http_requests_total",
+            (("endpoint", endpoint), ("method", request.method), ("status", response.status_code)),
+        )
+        if response.status_code >= 500:
+            registry.inc("http_request_errors_total", (("endpoint", endpoint),))
+        return response
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,279 @@
+"""
+indice de busqueda por nombre para autocompletar
+
+se registra como un indice secundario mas (Data.indexes), asi add, update
+y remove lo mantienen al dia. No resuelve predicados de query, solo
+search(texto, limit):
+
+    1. prefijo, con el mismo orden que scan_search: primero los nombres
+       que empiezan por la consulta (el exacto delante) y despues los que
+       tienen todas las palabras por prefijo, asi "serr" encuentra "Jamón
+       serrano"; dentro de cada nivel, los nombres cortos primero
+    2. si no hay bastantes, parecido por trigramas (jaccard), asi "jamon
+       sarrano" tambien lo encuentra
+
+la normalizacion quita acentos y mayusculas: "Jamón" y "jamon" son iguales
+
+los candidatos salen de la palabra de la consulta con menos entradas y,
+si son pocos (SCORED, o MAX_CANDIDATES con varias palabras), se puntuan
+todos antes de cortar. Si no, se leen en orden (longitud, nombre, id),
+que es el orden dentro de cada nivel, hasta tener limit: las entradas de
+una misma palabra ya estan en ese orden y se mezclan las de las palabras
+con ese prefijo (si son pocas; si no, se recorren todos los nombres por
+longitud)
+
+cuesta en torno a 1 KB por entidad (sobre todo los trigramas); con
+INGREDIENTS_SEARCH_INDEX=0 no se mantiene y scan_search da el paso 1
+recorriendo todas las entidades
+"""
+import heapq
+import math
+import unicodedata
+from collections import Counter, defaultdict
+from itertools import count
+from operator import itemgetter
+from app.core.sortedlist import SortedList
+
+# candidatos que se puntuan uno a uno; por encima se leen por longitud
+SCORED = 1000
+# con varias palabras, hasta cuantos se puntuan antes de leer por longitud
+MAX_CANDIDATES = 20_000
+# palabras distintas con el prefijo que se mezclan como mucho
+MAX_RUNS = 64
+# cuanto revisar como mucho para los parecidos, para que un trigrama muy
+# comun no recorra medio catalogo
+SIMILAR_CANDIDATES = 10
+TRIGRAM_POSTINGS = 5000
+MIN_SIMILARITY = 0.3
+
+
+def normalize(text: str) -> str:
+    if text.isascii():
+        # NFKD no cambia nada en ascii
+        return text.casefold().strip()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def scan_search(entities, text, limit=10, field="name"):
+    """search sin indice: O(n), solo por prefijo, mismo orden que SearchIndex"""
+    query = normalize(text)
+    if not query:
+        return []
+    words = query.split()
+    matches = []
+    for entity in entities:
+        name = normalize(getattr(entity, field))
+        level = _level(name, query, words)
+        if level is not None:
+            matches.append((level, len(name), name, entity.id, entity))
+            if len(matches) > 4 * limit:
+                # se poda de vez en cuando para no guardar todas las coincidencias
+                matches = heapq.nsmallest(limit, matches, key=_rank)
+    return [match[-1] for match in heapq.nsmallest(limit, matches, key=_rank)]
+
+
+def _rank(match):
+    return match[:3]
+
+
+class SearchIndex:
+    def __init__(self, field):
+        self.field = field
+        self._names = {}
+        # (palabra, longitud, nombre, id): para una palabra, ya en el orden
+        # en el que se puntua
+        self._words = SortedList()
+        # (nombre, id): para contar cuantos nombres empiezan por la consulta
+        self._full = SortedList()
+        # (longitud, nombre, id): si un prefijo tiene demasiadas palabras
+        self._by_length = SortedList()
+        # trigrama -> numeros de entidad: un int se hashea mucho mas barato
+        # que un uuid y cada nombre tiene unos 20 trigramas
+        self._trigrams = {}
+        self._numbers = {}
+        self._ids = {}
+        self._next = count()
+
+    def add(self, entity):
+        name = normalize(getattr(entity, self.field))
+        self._names[entity.id] = name
+        for word in set(name.split()):
+            self._words.add((word, len(name), name, entity.id))
+        self._full.add((name, entity.id))
+        self._by_length.add((len(name), name, entity.id))
+        self._add_trigrams(entity.id, name)
+
+    def add_many(self, entities):
+        words, full, by_length = [], [], []
+        # en listas y a sets al final: append es mas barato que add
+        postings = defaultdict(list)
+        for entity in entities:
+            id, name = entity.id, normalize(getattr(entity, self.field))
+            self._names[id] = name
+            words.extend((word, len(name), name, id) for word in set(name.split()))
+            full.append((name, id))
+            by_length.append((len(name), name, id))
+            number = self._numbers[id] = next(self._next)
+            self._ids[number] = id
+            for gram in trigrams(name):
+                postings[gram].append(number)
+        self._words.update(words)
+        self._full.update(full)
+        self._by_length.update(by_length)
+        for gram, numbers in postings.items():
+            current = self._trigrams.get(gram)
+            if current is None:
+                self._trigrams[gram] = set(numbers)
+            else:
+                current.update(numbers)
+
+    def remove(self, entity):
+        name = self._names.pop(entity.id, None)
+        if name is None:
+            return
+        for word in set(name.split()):
+            self._words.remove((word, len(name), name, entity.id))
+        self._full.remove((name, entity.id))
+        self._by_length.remove((len(name), name, entity.id))
+        number = self._numbers.pop(entity.id)
+        del self._ids[number]
+        for gram in trigrams(name):
+            postings = self._trigrams[gram]
+            postings.discard(number)
+            if not postings:
+                del self._trigrams[gram]
+
+    def update(self, entity):
+        if self._names.get(entity.id) == normalize(getattr(entity, self.field)):
+            return
+        self.remove(entity)
+        self.add(entity)
+
+    def supports(self, predicate):
+        return False
+
+    def search(self, text, limit=10):
+        """ids ordenados por relevancia: exacto, prefijo del nombre, prefijo de
+        una palabra, mas corto primero; despues los parecidos"""
+        query = normalize(text)
+        if not query:
+            return []
+        ids = self._prefix_search(query, query.split(), limit)
+        if len(ids) < limit:
+            seen = set(ids)
+            ids += [id for id in self._similar(query, limit) if id not in seen][:limit - len(ids)]
+        return ids
+
+    def _prefix_search(self, query, words, limit):
+        counts = {word: _count(self._words, word) for word in words}
+        ordered = sorted(counts, key=counts.get)
+        word = ordered[0]
+        # con varias palabras se puntuan todos si no son demasiados: leer por
+        # longitud puede recorrer muchos que no tienen las otras palabras
+        if counts[word] <= SCORED or (len(words) > 1 and counts[word] <= MAX_CANDIDATES):
+            return self._scored(query, words, word, limit)
+        runs = next(filter(None, map(self._in_length_order, ordered)), None)
+        if runs is None:
+            runs = iter(self._by_length)
+        # por (longitud, nombre, id) los primeros que coinciden de cada nivel
+        # son los mejores. Los de rank 0-1 estan entre los candidatos y se
+        # sabe cuantos hay: al tenerlos, y limit en total, no hace falta seguir
+        wanted = min(limit, _count(self._full, query))
+        first, rest = [], []
+        seen = set()
+        for length, name, id in runs:
+            # descarte barato antes de partir el nombre en palabras
+            if len(words) > 1 and not all(q in name for q in words) or id in seen:
+                continue
+            seen.add(id)
+            level = _level(name, query, words)
+            if level is None:
+                continue
+            (first if level < 2 else rest).append(id)
+            if len(first) == wanted and len(first) + len(rest) >= limit:
+                break
+        return (first + rest)[:limit]
+
+    def _scored(self, query, words, word, limit):
+        others = [q for q in words if q != word]
+        ranked = []
+        # un nombre con dos palabras con el mismo prefijo sale dos veces
+        for length, name, id in {entry[1:] for entry in _prefixed(self._words, word)}:
+            # descarte barato antes de partir el nombre en palabras
+            if others and not all(q in name for q in others):
+                continue
+            level = _level(name, query, words)
+            if level is not None:
+                ranked.append((level, length, name, id))
+        return [id for *_, id in heapq.nsmallest(limit, ranked)]
+
+    def _in_length_order(self, prefix):
+        # mezcla de las entradas de cada palabra con el prefijo; None si hay
+        # demasiadas palabras distintas
+        runs = []
+        upper = (prefix + "\U0010ffff",)
+        entry = next(self._words.irange((prefix,), upper), None)
+        while entry is not None:
+            if len(runs) == MAX_RUNS:
+                return None
+            word = entry[0]
+            runs.append(map(_without_word, self._words.irange((word,), (word, math.inf))))
+            # la siguiente palabra distinta con el mismo prefijo
+            entry = next(self._words.irange((word, math.inf), upper), None)
+        return heapq.merge(*runs)
+
+    def _similar(self, query, limit):
+        grams = trigrams(query)
+        # primero los trigramas raros: dan pocos candidatos y muy buenos
+        postings = sorted((self._trigrams.get(gram, ()) for gram in grams), key=len)
+        shared = Counter()
+        budget = TRIGRAM_POSTINGS
+        for posting in postings:
+            if len(posting) > budget:
+                break
+            shared.update(posting)
+            budget -= len(posting)
+        scored = []
+        for number, common in shared.most_common(SIMILAR_CANDIDATES * limit):
+            id = self._ids[number]
+            similarity = common / (len(grams) + len(trigrams(self._names[id])) - common)
+            if similarity >= MIN_SIMILARITY:
+                scored.append((similarity, id))
+        return [id for _, id in heapq.nlargest(limit, scored, key=itemgetter(0))]
+
+    def _add_trigrams(self, id, name):
+        number = self._numbers[id] = next(self._next)
+        self._ids[number] = id
+        for gram in trigrams(name):
+            postings = self._trigrams.get(gram)
+            if postings is None:
+                postings = self._trigrams[gram] = set()
+            postings.add(number)
+
+
+def _level(name, query, words):
+    # 0 exacto, 1 empieza por la consulta, 2 todas las palabras por
+    # prefijo; None si alguna palabra no coincide
+    name_words = name.split()
+    if not all(any(w.startswith(q) for w in name_words) for q in words):
+        return None
+    return 0 if name == query else 1 if name.startswith(query) else 2
+
+
+def _count(entries, prefix):
+    # entradas cuya primera componente empieza por prefix
+    return entries.bisect_left((prefix + "\U0010ffff",)) - entries.bisect_left((prefix,))
+
+
+def _prefixed(entries, prefix):
+    return entries.irange((prefix,), (prefix + "\U0010ffff",))
+
+
+def _without_word(entry):
+    return entry[1:]
@@ -0,0 +1,113 @@
+"""
+agrupa las llamadas concurrentes con la misma clave en una sola
+
+la primera que llega (lider) ejecuta la funcion; las que llegan mientras
+tanto esperan y reciben su mismo resultado o una copia de su excepcion
+(NotFoundException incluida): una excepcion lanzada a la vez en varios
+hilos compartiria traceback y contexto. Usa concurrent.futures.Future
+para que sirva entre hilos (flask con un servidor con hilos) y entre
+bucles de eventos
+
+las llamadas ejecutadas y las agrupadas se cuentan en el registro de
+metricas como singleflight_calls_total
+"""
+import asyncio
+import copy
+import threading
+from concurrent.futures import Future
+from app.core.metrics import registry as default_registry
+
+
+class SingleFlight:
+    def __init__(self, name, registry=default_registry):
+        self._name = name
+        self._registry = registry
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function):
+        future, leader = self._join(key)
+        if not leader:
+            return _outcome(future)
+        try:
+            result = function()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    async def do_async(self, key, function):
+        future, leader = self._join(key)
+        if not leader:
+            # wait y no await del future: cancelar a un esperador no debe
+            # cancelar la llamada de los demas
+            await asyncio.wait([asyncio.wrap_future(future)])
+            return _outcome(future)
+        try:
+            # un find en memoria no suspende: sin ceder el turno el lider
+            # acabaria antes de que otra corrutina del bucle pudiera unirse
+            await asyncio.sleep(0)
+            result = await function()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    def _join(self, key):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        self._registry.inc(
+            "singleflight_calls_total",
+            (("name", self._name), ("result", "executed" if leader else "coalesced")),
+        )
+        return future, leader
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+
+def _outcome(future):
+    error = future.exception()
+    if error is None:
+        return future.result()
+    try:
+        own = copy.copy(error)
+    except Exception:
+        # no todas las excepciones se pueden copiar; entonces la del lider
+        raise error
+    raise own from error
+
+
+class SingleFlightRepository:
+    """find agrupado por id; el resto va directo al repositorio"""
+    def __init__(self, repository, flight: SingleFlight):
+        self._repository = repository
+        self._flight = flight
+
+    def find(self, id, message="La entidad no existe"):
+        return self._flight.do(id, lambda: self._repository.find(id, message))
+
+    def __getattr__(self, name):
+        return getattr(self._repository, name)
+
+
+class AsyncSingleFlightRepository:
+    def __init__(self, repository, flight: SingleFlight):
+        self._repository = repository
+        self._flight = flight
+
+    async def find(self, id, message="La entidad no existe"):
+        return await self._flight.do_async(id, lambda: self._repository.find(id, message))
+
+    def __getattr__(self, name):
+        return getattr(self._repository, name)
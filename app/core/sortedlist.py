@@ -0,0 +1,117 @@
+"""
+lista ordenada por bloques para los indices
+
+una lista de python ordenada cuesta O(n) por insert/del: con 1M de
+entradas son cientos de microsegundos por escritura, y los indices se
+escriben con el lock exclusivo tomado. Aqui los valores se reparten en
+bloques de como mucho 2 * LOAD y se guarda el maximo de cada bloque:
+un bisect en los maximos elige el bloque y el insert/del solo mueve ese
+bloque
+
+los valores tienen que ser unicos y ordenables; los indices guardan
+tuplas (clave, id) para que remove encuentre su entrada con un bisect
+"""
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain
+
+
+class SortedList:
+    LOAD = 512
+
+    def __init__(self, values=()):
+        self._lists = []
+        self._maxes = []
+        self._len = 0
+        self.update(values)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return chain.from_iterable(self._lists)
+
+    def add(self, value):
+        if not self._maxes:
+            self._lists.append([value])
+            self._maxes.append(value)
+            self._len = 1
+            return
+        position = bisect_left(self._maxes, value)
+        if position == len(self._maxes):
+            # mayor que todo: va al final del ultimo bloque
+            position -= 1
+            self._lists[position].append(value)
+            self._maxes[position] = value
+        else:
+            insort(self._lists[position], value)
+        self._len += 1
+        self._split(position)
+
+    def update(self, values, presorted=False):
+        # carga masiva: un sort y se vuelve a partir en bloques; con
+        # presorted los valores ya vienen ordenados (p.ej. de un snapshot) y
+        # en una lista vacia ni se comparan
+        if presorted and not self._len:
+            values = list(values)
+        else:
+            values = sorted(chain(self, values))
+        self._lists = [values[i:i + self.LOAD] for i in range(0, len(values), self.LOAD)]
+        self._maxes = [block[-1] for block in self._lists]
+        self._len = len(values)
+
+    def remove(self, value):
+        position = bisect_left(self._maxes, value)
+        if position == len(self._maxes):
+            raise ValueError(value)
+        block = self._lists[position]
+        index = bisect_left(block, value)
+        if index == len(block) or block[index] != value:
+            raise ValueError(value)
+        del block[index]
+        self._len -= 1
+        if block:
+            self._maxes[position] = block[-1]
+        else:
+            del self._lists[position]
+            del self._maxes[position]
+
+    def bisect_left(self, value):
+        """cuantos valores hay menores que value; con dos, se cuenta un rango"""
+        position = bisect_left(self._maxes, value)
+        if position == len(self._maxes):
+            return self._len
+        return sum(map(len, self._lists[:position])) + bisect_left(self._lists[position], value)
+
+    def irange(self, minimum=None, maximum=None, inclusive=(True, True), key=None):
+        """
+        valores entre minimum y maximum en orden; None es sin limite y
+        key, como en bisect, dice contra que parte del valor se compara
+        """
+        if minimum is None:
+            position, index = 0, 0
+        else:
+            find = bisect_left if inclusive[0] else bisect_right
+            position = find(self._maxes, minimum, key=key)
+            if position == len(self._maxes):
+                return
+            index = find(self._lists[position], minimum, key=key)
+        stop = bisect_right if inclusive[1] else bisect_left
+        for position in range(position, len(self._lists)):
+            block = self._lists[position]
+            last = block[-1] if key is None else key(block[-1])
+            if maximum is None or last < maximum or (inclusive[1] and last == maximum):
+                yield from block[index:] if index else block
+            else:
+                yield from block[index:stop(block, maximum, key=key)]
+                return
+            index = 0
+
+    def _split(self, position):
+        block = self._lists[position]
+        if len(block) <= 2 * self.LOAD:
+            return
+        half = block[self.LOAD:]
+        del block[self.LOAD:]
+        self._maxes[position] = block[-1]
+        self._lists.insert(position + 1, half)
+        self._maxes.insert(position + 1, half[-1])
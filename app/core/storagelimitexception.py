@@ -0,0 +1,13 @@
+class StorageLimitException(Exception):
+    """la entidad es valida pero el almacen no la puede guardar"""
+    def __init__(self, message: str, code=422):
+        self._code = code
+        super().__init__(message)
+
+    @property
+    def code(self):
+        return self._code
+
+    @property
+    def message(self):
+        return self.args[0] if self.args else ""
@@ -0,0 +1,129 @@
+"""
+log de escritura anticipada (write-ahead log) de solo añadir
+
+cada registro es: tipo (1 byte) + longitud (4) + crc32 (4) + payload
+
+escribir y hacer fsync estan separados: write() deja el registro en el
+fichero y devuelve su numero de secuencia, sync(seq) espera a que este en
+disco. Quien llega a sync cuando otro hilo ya esta haciendo fsync espera
+y normalmente encuentra su registro ya escrito (group commit), asi un
+fsync cubre a todos los que escribieron mientras tanto
+
+para guardar un snapshot sin parar a los escritores, rotate() pasa lo
+escrito hasta ese momento a <path>.1 y sigue en un log vacio; cuando el
+snapshot esta en disco drop_rotated() lo borra. replay() lee los dos
+"""
+import contextlib
+import os
+import struct
+import threading
+import zlib
+
+HEADER = struct.Struct("<BII")
+
+
+class WriteAheadLog:
+    def __init__(self, path):
+        self._path = path
+        self._rotated = f"{path}.1"
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._written = 0
+        self._synced = 0
+        self._file = open(path, "ab")
+
+    def write(self, kind, payload: bytes):
+        record = HEADER.pack(kind, len(payload), zlib.crc32(payload)) + payload
+        with self._lock:
+            self._file.write(record)
+            self._written += 1
+            return self._written
+
+    def sync(self, seq):
+        with self._sync_lock:
+            if self._synced >= seq:
+                return
+            with self._lock:
+                self._file.flush()
+                target = self._written
+            os.fsync(self._file.fileno())
+            self._synced = target
+
+    def append(self, kind, payload: bytes):
+        self.sync(self.write(kind, payload))
+
+    def replay(self):
+        """
+        devuelve los registros (tipo, payload) validos; si el final esta
+        cortado o corrupto (caida a mitad de escritura) se descarta desde ahi
+        """
+        records = []
+        if os.path.exists(self._rotated):
+            records = self._read(self._rotated)
+        with self._lock:
+            self._file.flush()
+        return records + self._read(self._path)
+
+    def _read(self, path):
+        with open(path, "rb") as file:
+            content = file.read()
+        records = []
+        offset = 0
+        while offset + HEADER.size <= len(content):
+            kind, length, crc = HEADER.unpack_from(content, offset)
+            payload = content[offset + HEADER.size:offset + HEADER.size + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            records.append((kind, payload))
+            offset += HEADER.size + length
+        if offset < len(content):
+            if path == self._path:
+                self._truncate(offset)
+            else:
+                with open(path, "r+b") as file:
+                    file.truncate(offset)
+                    os.fsync(file.fileno())
+        return records
+
+    def rotate(self):
+        """
+        aparta lo escrito hasta ahora en <path>.1, ya en disco; si quedaba
+        uno de un snapshot que no llego a terminar se le añade detras, asi
+        replay sigue viendo los registros en orden
+        """
+        with self._sync_lock, self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            if os.path.exists(self._rotated):
+                with open(self._path, "rb") as source, open(self._rotated, "ab") as target:
+                    target.write(source.read())
+                    target.flush()
+                    os.fsync(target.fileno())
+                self._file.truncate(0)
+                os.fsync(self._file.fileno())
+            else:
+                self._file.close()
+                os.replace(self._path, self._rotated)
+                self._file = open(self._path, "ab")
+            self._synced = self._written
+
+    def drop_rotated(self):
+        """borra <path>.1, despues de guardar un snapshot con todo su contenido"""
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._rotated)
+
+    def reset(self):
+        """vacia el log, despues de guardar un snapshot con todo su contenido"""
+        self._truncate(0)
+        self.drop_rotated()
+
+    def _truncate(self, size):
+        with self._sync_lock, self._lock:
+            self._file.flush()
+            self._file.truncate(size)
+            os.fsync(self._file.fileno())
+            self._synced = self._written
+
+    def close(self):
+        with self._lock:
+            self._file.close()
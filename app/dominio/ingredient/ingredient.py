@@ -1,8 +1,10 @@
 from app.core.entitybase import EntityBase
 
 class Ingredient(EntityBase):
-    def __init__(self, id, name, cost):
-        super().__init__(id)
+    __slots__ = ("_name", "_cost")
+
+    def __init__(self, id, name, cost, version=0):
+        super().__init__(id, version)
         """
         no hacer acciones que afecten a puntos externos a la entidad:
             como por ejemplo registro de eventos
@@ -1,17 +1,17 @@
-import copy
 from app.core.entitybase import EntityBase
 
 
 
 class Pizza(EntityBase):
     PROFIT = 1.2
+    __slots__ = ("_name", "_description", "_url", "_ingredients", "_cost", "_snapshot")
 
     def __init__(self, id, name, description, url, ingredients):
         super().__init__(id)
         self._name = name
         self._description = description
         self._url = url
-        self._ingredients = copy.deepcopy(ingredients)
+        self._set_ingredients(ingredients)
 
     @property
     def name(self):
@@ -27,19 +27,28 @@ class Pizza(EntityBase):
 
     @property
     def ingredient(self):
-        return copy.deepcopy(self._ingredients)
+        # los ingredientes son tuplas inmutables, no hace falta deepcopy:
+        # devolvemos un frozenset que se reutiliza hasta el siguiente cambio
+        if self._snapshot is None:
+            self._snapshot = frozenset(self._ingredients)
+        return self._snapshot
 
     @property
     def price(self):
-        return sum(cost for _, cost in self._ingredients) * Pizza.PROFIT
+        return self._cost * Pizza.PROFIT
 
     def add_ingredient(self, ingredient):
         # pizza.addingredient
-        self._ingredients.add(ingredient)
+        if ingredient not in self._ingredients:
+            self._ingredients.add(ingredient)
+            self._cost += ingredient[1]
+            self._snapshot = None
 
     def remove_ingredient(self, ingredeint):
         # pizza.removeingredient
         self._ingredients.remove(ingredeint)
+        self._cost -= ingredeint[1]
+        self._snapshot = None
 
     @classmethod
     def create(cls, id, name, description, url, ingredients):
@@ -51,4 +60,10 @@ class Pizza(EntityBase):
         self._name = name
         self._description = description
         self._url = url
-        self._ingredients = ingredients
+        self._set_ingredients(ingredients)
+
+    def _set_ingredients(self, ingredients):
+        # copia superficial para no compartir el set del que llama
+        self._ingredients = set(ingredients)
+        self._cost = sum(cost for _, cost in self._ingredients)
+        self._snapshot = None
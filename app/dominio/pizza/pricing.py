@@ -0,0 +1,47 @@
+"""
+precio de toda la carta en una sola pasada con numpy
+
+precios = (matriz pizza x ingrediente @ vector de costes) * beneficio
+
+las columnas son las tuplas (nombre, coste) tal y como las guarda Pizza,
+asi el resultado coincide con Pizza.price; para simular cambios de coste
+se pasa un diccionario nombre -> coste nuevo
+"""
+import numpy as np
+from app.dominio.pizza.pizza import Pizza
+
+
+class PricingEngine:
+    def __init__(self, pizzas):
+        pizzas = list(pizzas)
+        self._ids = [pizza.id for pizza in pizzas]
+        columns = {}
+        rows, cols = [], []
+        for row, pizza in enumerate(pizzas):
+            for ingredient in pizza.ingredient:
+                rows.append(row)
+                cols.append(columns.setdefault(ingredient, len(columns)))
+        self._names = np.array([name for name, _ in columns], dtype=object)
+        self._costs = np.fromiter((cost for _, cost in columns), dtype=np.float64, count=len(columns))
+        self._matrix = np.zeros((len(pizzas), len(columns)), dtype=np.float64)
+        self._matrix[rows, cols] = 1.0
+
+    @property
+    def ids(self):
+        return self._ids
+
+    def prices(self, profit=None, costs=None):
+        """
+        profit: margen a usar en vez de Pizza.PROFIT
+        costs: diccionario nombre de ingrediente -> coste nuevo
+        """
+        profit = Pizza.PROFIT if profit is None else profit
+        vector = self._costs
+        if costs:
+            vector = vector.copy()
+            for name, cost in costs.items():
+                vector[self._names == name] = cost
+        return self._matrix @ vector * profit
+
+    def as_dict(self, profit=None, costs=None):
+        return dict(zip(self._ids, self.prices(profit, costs).tolist()))
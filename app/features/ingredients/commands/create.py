@@ -1,12 +1,14 @@
 import uuid
 from app.dominio.ingredient.ingredient import Ingredient
 from app.core.custombasemodel import CustomBaseModel
-from flask import Blueprint, jsonify
-from pydantic import StringConstraints
-from typing import Annotated
+from app.core.jsonresponse import json_response
+from flask import Blueprint
 from flask_pydantic import validate
+from pydantic import Field, StringConstraints
+from typing import Annotated
 from app.infraestructure.ingredients.ingredientsrepository import (
     ingredient_repository as respository,
+    async_ingredient_repository as async_repository,
 )
 
 bp = Blueprint("ingredient_create", __name__)
@@ -14,7 +16,8 @@ bp = Blueprint("ingredient_create", __name__)
 
 class Request(CustomBaseModel):
     name: Annotated[str, StringConstraints(min_length=1)]
-    cost: float
+    # NaN no se puede ordenar en el indice por coste (ni escribir en json)
+    cost: Annotated[float, Field(allow_inf_nan=False)]
 
 
 class Response(CustomBaseModel):
@@ -29,12 +32,24 @@ class Service:
     def __call__(self, req: Request) -> Response:
         ingredient = Ingredient.create(uuid.uuid4(), req.name, req.cost)
         self._repository.add(ingredient)
-        return Response(id=ingredient.id, name=ingredient.name, cost=ingredient.cost)
+        return Response.trusted(id=ingredient.id, name=ingredient.name, cost=ingredient.cost)
+
+
+class AsyncService:
+    def __init__(self, repository):
+        self._repository = repository
+    async def __call__(self, req: Request) -> Response:
+        ingredient = Ingredient.create(uuid.uuid4(), req.name, req.cost)
+        await self._repository.add(ingredient)
+        return Response.trusted(id=ingredient.id, name=ingredient.name, cost=ingredient.cost)
 
 
 service = Service(respository)
+# para quien ya corre en un bucle de eventos; la vista es sync porque con
+# WSGI flask abre un bucle por peticion para una vista async
+async_service = AsyncService(async_repository)
 
 @bp.route("/ingredients", methods=["POST"])
 @validate()
 def controller(body: Request):
-    return service(body), 201
+    return json_response(service(body), 201)
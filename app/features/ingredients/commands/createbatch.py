@@ -0,0 +1,60 @@
+import uuid
+from app.dominio.ingredient.ingredient import Ingredient
+from app.core.custombasemodel import CustomBaseModel
+from app.core.jsonresponse import json_response
+from flask import Blueprint, jsonify, request
+from pydantic import ValidationError
+from app.features.ingredients.commands.create import Request
+from app.infraestructure.ingredients.ingredientsrepository import (
+    ingredient_repository as respository,
+)
+
+bp = Blueprint("ingredient_create_batch", __name__)
+
+# el lote se valida e inserta de una vez con el lock de escritura tomado;
+# para mas, /ingredients/import
+MAX_ITEMS = 1000
+
+
+class Error(CustomBaseModel):
+    index: int
+    errors: list[dict]
+
+
+class Response(CustomBaseModel):
+    ids: list[uuid.UUID]
+    errors: list[Error]
+
+
+class Service:
+    def __init__(self, repository):
+        self._repository = repository
+    def __call__(self, items: list) -> Response:
+        # una sola pasada: los validos se insertan juntos con add_many,
+        # los invalidos se informan por su posicion en el array
+        ingredients = []
+        errors = []
+        for index, item in enumerate(items):
+            try:
+                req = Request.model_validate(item)
+            except ValidationError as e:
+                errors.append(Error(index=index, errors=e.errors(include_url=False, include_context=False)))
+                continue
+            ingredients.append(Ingredient.create(uuid.uuid4(), req.name, req.cost))
+        self._repository.add_many(ingredients)
+        return Response.trusted(ids=[i.id for i in ingredients], errors=errors)
+
+
+service = Service(respository)
+
+@bp.route("/ingredients:batch", methods=["POST"])
+def controller():
+    items = request.get_json(silent=True)
+    if not isinstance(items, list) or not items:
+        return jsonify({"message": "El body debe ser un array de ingredientes no vacio"}), 400
+    if len(items) > MAX_ITEMS:
+        return jsonify({"message": f"Como mucho {MAX_ITEMS} ingredientes por lote"}), 413
+    response = service(items)
+    # 207 cuando solo una parte del lote se ha creado, 422 si ninguna
+    status = 422 if not response.ids else 207 if response.errors else 201
+    return json_response(response, status)
@@ -0,0 +1,109 @@
+import uuid
+from typing import Optional
+from app.dominio.ingredient.ingredient import Ingredient
+from app.core.custombasemodel import CustomBaseModel
+from app.core.jsonresponse import json_response
+from flask import Blueprint, request
+from pydantic import ValidationError
+from app.features.ingredients.commands.create import Request
+from app.infraestructure.ingredients.ingredientsrepository import (
+    ingredient_repository as respository,
+)
+
+bp = Blueprint("ingredient_import", __name__)
+
+# ingredientes por add_many
+CHUNK = 1000
+# errores que se devuelven con detalle; el resto solo se cuentan
+MAX_ERRORS = 100
+
+
+class Line(Request):
+    # las lineas de /ingredients/export traen el id: se conserva, asi las
+    # referencias a /ingredients/<id> siguen valiendo y reimportar no duplica
+    id: Optional[uuid.UUID] = None
+
+
+class Error(CustomBaseModel):
+    line: int
+    errors: list[dict]
+
+
+class Response(CustomBaseModel):
+    created: int
+    # ids que ya estaban: add_many no los toca
+    skipped: int
+    failed: int
+    errors: list[Error]
+
+
+class Service:
+    """
+    importa NDJSON (un Request de create por linea, con id opcional)
+    leyendo de cualquier iterable de lineas; inserta por bloques de CHUNK
+    con add_many y sigue aunque una linea no valide o no se pueda guardar,
+    asi la memoria no depende del tamano
+    """
+    def __init__(self, repository):
+        self._repository = repository
+    def __call__(self, lines) -> Response:
+        # el servicio es compartido entre peticiones: el estado va aparte
+        job = _Import(self._repository)
+        pending = []
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                req = Line.model_validate_json(line)
+            except ValidationError as e:
+                job.fail(number, e.errors(include_url=False, include_context=False, include_input=False))
+                continue
+            pending.append((number, Ingredient.create(req.id or uuid.uuid4(), req.name, req.cost)))
+            if len(pending) == CHUNK:
+                job.insert(pending)
+                pending = []
+        if pending:
+            job.insert(pending)
+        return Response.trusted(created=job.created, skipped=job.skipped,
+                                failed=job.failed, errors=job.errors)
+
+
+class _Import:
+    def __init__(self, repository):
+        self._repository = repository
+        self.created = self.skipped = self.failed = 0
+        self.errors = []
+
+    def insert(self, pending):
+        try:
+            self._save([ingredient for _, ingredient in pending])
+        except Exception:
+            # el bloque no se ha guardado (p.ej. un nombre que no cabe en la
+            # memoria compartida): se repite de uno en uno para saber que
+            # lineas fallan sin perder el resto
+            for number, ingredient in pending:
+                try:
+                    self._save([ingredient])
+                except Exception as e:
+                    self.fail(number, [{"type": type(e).__name__, "msg": str(e)}])
+
+    def fail(self, number, details):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(Error(line=number, errors=details))
+
+    def _save(self, ingredients):
+        created = self._repository.add_many(ingredients)
+        self.created += created
+        self.skipped += len(ingredients) - created
+
+
+service = Service(respository)
+
+@bp.route("/ingredients/import", methods=["POST"])
+def controller():
+    # request.stream se lee linea a linea segun llega, sin cargar el body
+    response = service(request.stream)
+    # 207 cuando solo una parte se ha importado, como en el batch
+    status = 207 if response.failed else 201
+    return json_response(response, status)
@@ -0,0 +1,35 @@
+from flask import Blueprint, Response as FlaskResponse
+from app.features.ingredients.queries.get import Response
+from app.infraestructure.ingredients.ingredientsrepository import (
+    ingredient_repository as respository,
+)
+
+bp = Blueprint("ingredient_export", __name__)
+
+# lineas por escritura: menos llamadas al servidor sin guardar el catalogo
+CHUNK = 256
+
+
+class Service:
+    """
+    genera el catalogo como NDJSON, un Response de get por linea; recorre
+    con scan (keyset por bloques), asi la memoria no crece con el catalogo
+    """
+    def __init__(self, repository):
+        self._repository = repository
+    def __call__(self):
+        lines = []
+        for i in self._repository.scan():
+            lines.append(Response.trusted(id=i.id, name=i.name, cost=i.cost).model_dump_json())
+            if len(lines) == CHUNK:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+
+service = Service(respository)
+
+@bp.route("/ingredients/export", methods=["GET"])
+def controller():
+    return FlaskResponse(service(), mimetype="application/x-ndjson")
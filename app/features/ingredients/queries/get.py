@@ -1,10 +1,16 @@
 import uuid
 from app.dominio.ingredient.ingredient import Ingredient
 from app.core.custombasemodel import CustomBaseModel
-from flask import Blueprint,jsonify
-from flask_pydantic import validate
+from app.core.jsonresponse import json_response
+from app.core.singleflight import (
+    AsyncSingleFlightRepository,
+    SingleFlight,
+    SingleFlightRepository,
+)
+from flask import Blueprint, make_response, request
 from app.infraestructure.ingredients.ingredientsrepository import (
     ingredient_repository as respository,
+    async_ingredient_repository as async_repository,
 )
 
 bp = Blueprint("ingredient_get", __name__)
@@ -15,17 +21,47 @@ class Response(CustomBaseModel):
     cost: float
 
 
+def etag(ingredient: Ingredient) -> str:
+    # la version la sube repository.update, no hace falta hashear el cuerpo
+    return str(ingredient.version)
+
+
 class Service:
+    """
+    devuelve (etag, Response); si el etag esta en etags (el If-None-Match
+    de la peticion) devuelve (etag, None) sin montar la respuesta
+    """
+    def __init__(self, repository):
+        self._repository = repository
+    def __call__(self, id: uuid.UUID, etags=None) -> tuple[str, Response | None]:
+        ingredient:Ingredient = self._repository.find(id)
+        tag = etag(ingredient)
+        if etags is not None and etags.contains_weak(tag):
+            return tag, None
+        return tag, Response.trusted(id=ingredient.id, name=ingredient.name, cost=ingredient.cost)
+
+
+class AsyncService:
     def __init__(self, repository):
         self._repository = repository
-    def __call__(self, id: uuid.UUID) -> Response:
-        ingredient:Ingredient = respository.find(id)
-        return Response(id=ingredient.id, name=ingredient.name, cost=ingredient.cost)
+    async def __call__(self, id: uuid.UUID, etags=None) -> tuple[str, Response | None]:
+        ingredient:Ingredient = await self._repository.find(id)
+        tag = etag(ingredient)
+        if etags is not None and etags.contains_weak(tag):
+            return tag, None
+        return tag, Response.trusted(id=ingredient.id, name=ingredient.name, cost=ingredient.cost)
 
 
-service = Service(respository)
+# las lecturas concurrentes del mismo id comparten un solo find
+flight = SingleFlight("ingredient_get")
+service = Service(SingleFlightRepository(respository, flight))
+# para quien ya corre en un bucle de eventos; la vista es sync porque con
+# WSGI flask abre un bucle por peticion para una vista async
+async_service = AsyncService(AsyncSingleFlightRepository(async_repository, flight))
 
 @bp.route("/ingredients/<uuid:id>")
-@validate()
 def controller(id:uuid.UUID):
-    return service(id)
+    tag, response = service(id, request.if_none_match)
+    result = make_response("", 304) if response is None else json_response(response)
+    result.set_etag(tag)
+    return result
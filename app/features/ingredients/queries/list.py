@@ -0,0 +1,75 @@
+import base64
+import binascii
+import uuid
+from itertools import islice
+from typing import Annotated, Optional
+from app.dominio.ingredient.ingredient import Ingredient
+from app.core.custombasemodel import CustomBaseModel
+from app.core.jsonresponse import json_response
+from flask import Blueprint
+from flask_pydantic import validate
+from pydantic import Field, field_validator
+from app.infraestructure.ingredients.ingredientsrepository import (
+    ingredient_repository as respository,
+)
+
+bp = Blueprint("ingredient_list", __name__)
+
+
+def encode_cursor(id: uuid.UUID) -> str:
+    return base64.urlsafe_b64encode(id.bytes).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(bytes=base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise ValueError("cursor invalido")
+
+
+class Request(CustomBaseModel):
+    cursor: Optional[str] = None
+    limit: Annotated[int, Field(ge=1, le=100)] = 10
+
+    @field_validator("cursor")
+    @classmethod
+    def check_cursor(cls, cursor):
+        if cursor is not None:
+            decode_cursor(cursor)
+        return cursor
+
+
+class Item(CustomBaseModel):
+    id: uuid.UUID
+    name: str
+    cost: float
+
+
+class Response(CustomBaseModel):
+    items: list[Item]
+    next: Optional[str] = None
+
+
+class Service:
+    def __init__(self, repository):
+        self._repository = repository
+    def __call__(self, req: Request) -> Response:
+        after = decode_cursor(req.cursor) if req.cursor else None
+        # pedimos uno de mas para saber si hay pagina siguiente
+        ingredients: list[Ingredient] = list(
+            islice(self._repository.scan(after), req.limit + 1)
+        )
+        page = ingredients[:req.limit]
+        next = encode_cursor(page[-1].id) if len(ingredients) > req.limit else None
+        return Response.trusted(
+            items=[Item.trusted(id=i.id, name=i.name, cost=i.cost) for i in page],
+            next=next,
+        )
+
+
+service = Service(respository)
+
+@bp.route("/ingredients", methods=["GET"])
+@validate()
+def controller(query: Request):
+    return json_response(service(query))
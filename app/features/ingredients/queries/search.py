@@ -0,0 +1,46 @@
+import uuid
+from typing import Annotated
+from app.dominio.ingredient.ingredient import Ingredient
+from app.core.custombasemodel import CustomBaseModel
+from app.core.jsonresponse import json_response
+from flask import Blueprint
+from flask_pydantic import validate
+from pydantic import Field
+from app.infraestructure.ingredients.ingredientsrepository import (
+    ingredient_repository as respository,
+)
+
+bp = Blueprint("ingredient_search", __name__)
+
+
+class Request(CustomBaseModel):
+    q: Annotated[str, Field(min_length=1, max_length=100)]
+    limit: Annotated[int, Field(ge=1, le=50)] = 10
+
+
+class Item(CustomBaseModel):
+    id: uuid.UUID
+    name: str
+    cost: float
+
+
+class Response(CustomBaseModel):
+    items: list[Item]
+
+
+class Service:
+    def __init__(self, repository):
+        self._repository = repository
+    def __call__(self, req: Request) -> Response:
+        ingredients: list[Ingredient] = self._repository.search(req.q, req.limit)
+        return Response.trusted(
+            items=[Item.trusted(id=i.id, name=i.name, cost=i.cost) for i in ingredients]
+        )
+
+
+service = Service(respository)
+
+@bp.route("/ingredients/search", methods=["GET"])
+@validate()
+def controller(query: Request):
+    return json_response(service(query))
@@ -0,0 +1,113 @@
+"""
+cliente http reutilizable para los procesos de sincronizacion
+
+    - una requests.Session con pool de conexiones keep-alive, sin un
+      handshake tcp por llamada
+    - reintentos con backoff exponencial para errores de conexion y
+      502/503/504 (solo metodos idempotentes, un POST no se repite)
+    - map() reparte un lote de llamadas en un pool de hilos acotado; un
+      error en una llamada no corta el resto, va en su posicion
+    - tiempos por metodo para ver p50/p95/p99 al final del lote
+
+    client = HttpClient("http://localhost:5000", pool_size=16)
+    results = client.map([("POST", "/ingredients", {"json": body}) for body in bodies])
+    failed = [r for r in results if isinstance(r, Exception)]
+    print(client.stats())
+"""
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class HttpClient:
+    def __init__(self, base_url, pool_size=10, retries=3, backoff=0.1, timeout=5.0):
+        self._base_url = base_url.rstrip("/")
+        self._pool_size = pool_size
+        self._timeout = timeout
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self._session = requests.Session()
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._timings = {}
+        self._errors = {}
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault("timeout", self._timeout)
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = self._session.request(method, f"{self._base_url}{path}", **kwargs)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._timings.setdefault(method, []).append(elapsed)
+                self._errors[method] = self._errors.get(method, 0) + failed
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def map(self, calls, max_workers=None):
+        """
+        calls: iterable de (metodo, path) o (metodo, path, kwargs); devuelve
+        en el mismo orden la respuesta de cada llamada o la excepcion que
+        lanzo (p.ej. requests.ConnectionError), sin parar el lote. No se
+        abren mas hilos que conexiones tiene el pool, asi ninguna llamada
+        espera por un socket
+        """
+        def call(item):
+            method, path, *rest = item
+            return self.request(method, path, **(rest[0] if rest else {}))
+
+        workers = min(max_workers or self._pool_size, self._pool_size)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(call, item) for item in calls]
+        results = []
+        for future in futures:
+            error = future.exception()
+            results.append(future.result() if error is None else error)
+        return results
+
+    def stats(self):
+        result = {}
+        with self._lock:
+            for method, timings in self._timings.items():
+                quantiles = statistics.quantiles(timings, n=100) if len(timings) > 1 else timings * 99
+                result[method] = {
+                    "count": len(timings),
+                    "errors": self._errors[method],
+                    "p50_ms": quantiles[49] * 1e3,
+                    "p95_ms": quantiles[94] * 1e3,
+                    "p99_ms": quantiles[98] * 1e3,
+                }
+        return result
+
+    def close(self):
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,309 @@
+"""
+almacen de ingredientes por columnas en vez de un objeto por fila
+
+    ids    -> array de 16 bytes por uuid
+    costs  -> array float64
+    versions -> array uint64
+    names  -> un buffer de bytes utf-8 con offset y longitud por fila
+
+mantiene la API de IngredientRepository (add/find/update/remove/query/
+scan/search) y solo crea objetos Ingredient al devolverlos; los filtros y
+sumas por coste se hacen vectorizados sobre la columna. El orden por id
+de scan se calcula la primera vez que hace falta; despues add y remove
+insertan o quitan su posicion en vez de volver a ordenar
+"""
+import uuid
+from itertools import islice
+import numpy as np
+from app.core.notfoundexception import NotFoundException
+from app.core.rwlock import RWLock
+from app.core.searchindex import scan_search
+from app.dominio.ingredient.ingredient import Ingredient
+
+
+class ColumnarIngredientRepository:
+    SCAN_CHUNK = 256
+
+    def __init__(self, data=(), capacity=1024):
+        self._size = 0
+        self._ids = np.zeros((capacity, 16), dtype=np.uint8)
+        self._costs = np.zeros(capacity, dtype=np.float64)
+        self._versions = np.zeros(capacity, dtype=np.uint64)
+        self._name_offsets = np.zeros(capacity, dtype=np.int64)
+        self._name_lengths = np.zeros(capacity, dtype=np.int64)
+        self._names = bytearray()
+        self._live_name_bytes = 0
+        self._rows = {}
+        # (hi, lo, filas) ordenados por id, None si hay que recalcularlo
+        self._order = None
+        self.add_many(list(data))
+
+    def __len__(self):
+        return self._size
+
+    def add(self, entity: Ingredient):
+        self._grow(self._size + 1)
+        size = self._size
+        self._insert(entity)
+        self._order_insert(size)
+
+    def add_many(self, entities: list[Ingredient]):
+        self._grow(self._size + len(entities))
+        size = self._size
+        for entity in entities:
+            self._insert(entity)
+        self._order_insert(size)
+        return self._size - size
+
+    def find(self, id, message="La entidad no existe"):
+        row = self._rows.get(id)
+        if row is None:
+            raise NotFoundException(message)
+        return self._materialize(row)
+
+    def update(self, entity: Ingredient):
+        row = self._rows[entity.id]
+        length = int(self._name_lengths[row])
+        version = int(self._versions[row]) + 1
+        # si _write falla no ha tocado la fila, y ni la version ni la
+        # cuenta de bytes vivos han cambiado
+        self._write(row, entity, version)
+        self._live_name_bytes -= length
+        entity.bump_version(version)
+        self._compact_names()
+
+    def remove(self, entity):
+        row = self._rows.pop(entity.id)
+        self._live_name_bytes -= int(self._name_lengths[row])
+        last = self._size - 1
+        self._order_remove(entity.id, row, last)
+        if row != last:
+            # movemos la ultima fila al hueco para mantener las columnas densas
+            self._ids[row] = self._ids[last]
+            self._costs[row] = self._costs[last]
+            self._versions[row] = self._versions[last]
+            self._name_offsets[row] = self._name_offsets[last]
+            self._name_lengths[row] = self._name_lengths[last]
+            self._rows[uuid.UUID(bytes=self._ids[row].tobytes())] = row
+        self._size = last
+        self._compact_names()
+
+    def query(self, predicate, page=0, size=10):
+        start_index = page * size
+        rows = self._select(predicate)
+        if rows is None:
+            matches = (e for e in map(self._materialize, range(self._size)) if predicate(e))
+        else:
+            matches = map(self._materialize, rows[start_index:start_index + size].tolist())
+            start_index = 0
+        return list(islice(matches, start_index, start_index + size))
+
+    def scan(self, after=None, predicate=None, field="id", after_id=None):
+        if field != "id":
+            raise ValueError("el almacen por columnas solo recorre por id")
+        # por bloques y siguiendo desde el ultimo id, como sqlite: un add o
+        # remove entre bloques mueve filas pero no el orden por id. El primer
+        # bloque es pequeño para que una pagina no materialice SCAN_CHUNK
+        size = 16
+        while True:
+            chunk = self._chunk(after, size)
+            for entity in chunk:
+                if predicate is None or predicate(entity):
+                    yield entity
+            if len(chunk) < size:
+                return
+            after = chunk[-1].id
+            size = min(2 * size, self.SCAN_CHUNK)
+
+    def search(self, text, limit=10):
+        return scan_search(self.scan(), text, limit)
+
+    def total_cost(self, predicate=None):
+        if predicate is None:
+            return float(self._costs[:self._size].sum())
+        rows = self._select(predicate)
+        if rows is None:
+            return sum(e.cost for e in map(self._materialize, range(self._size)) if predicate(e))
+        return float(self._costs[rows].sum())
+
+    def _chunk(self, after, size):
+        hi, lo, rows = self._sorted()
+        start = 0 if after is None else _position(hi, lo, *_key(after), "right")
+        return [self._materialize(row) for row in rows[start:start + size].tolist()]
+
+    def _sorted(self):
+        if self._order is None:
+            # uuid.bytes es big endian, asi que (hi, lo) ordena igual que uuid.UUID
+            keys = self._ids[:self._size].view(">u8")
+            rows = np.lexsort((keys[:, 1], keys[:, 0]))
+            # en orden de bytes nativo: searchsorted sobre big endian
+            # convertiria la columna entera en cada bloque
+            self._order = (keys[rows, 0].astype(np.uint64), keys[rows, 1].astype(np.uint64), rows)
+        return self._order
+
+    def _order_insert(self, first):
+        # las filas desde first son nuevas: se insertan en el orden ya
+        # calculado, O(n) en vez del O(n log n) de ordenar otra vez
+        if self._order is None or first == self._size:
+            return
+        hi, lo, rows = self._order
+        keys = self._ids[first:self._size].view(">u8")
+        new = np.lexsort((keys[:, 1], keys[:, 0]))
+        new_hi, new_lo = keys[new, 0].astype(np.uint64), keys[new, 1].astype(np.uint64)
+        positions = np.searchsorted(hi, new_hi, "left")
+        # mismo hi (casi nunca con uuids aleatorios): se desempata por lo
+        ties = np.flatnonzero(positions != np.searchsorted(hi, new_hi, "right"))
+        for i in ties.tolist():
+            positions[i] = _position(hi, lo, new_hi[i], new_lo[i], "left")
+        self._order = (np.insert(hi, positions, new_hi), np.insert(lo, positions, new_lo),
+                       np.insert(rows, positions, new + first))
+
+    def _order_remove(self, id, row, last):
+        if self._order is None:
+            return
+        hi, lo, rows = self._order
+        position = _position(hi, lo, *_key(id), "left")
+        rows = np.delete(rows, position)
+        # remove mueve la ultima fila al hueco
+        rows[rows == last] = row
+        self._order = (np.delete(hi, position), np.delete(lo, position), rows)
+
+    def _select(self, predicate):
+        # filas que cumplen un predicado estructurado sobre cost, None si no
+        # se puede resolver por columnas y hay que materializar
+        mask = self._mask(predicate)
+        return None if mask is None else np.flatnonzero(mask)
+
+    def _mask(self, predicate):
+        costs = self._costs[:self._size]
+        op = getattr(predicate, "op", None)
+        if op == "and":
+            masks = [self._mask(p) for p in predicate.predicates]
+            if any(mask is None for mask in masks):
+                return None
+            return np.logical_and.reduce(masks) if masks else np.ones(self._size, bool)
+        if getattr(predicate, "field", None) != "cost":
+            return None
+        if op == "eq":
+            return costs == predicate.value
+        if op == "range":
+            mask = np.ones(self._size, dtype=bool)
+            if predicate.low is not None:
+                mask &= costs >= predicate.low
+            if predicate.high is not None:
+                mask &= costs <= predicate.high
+            return mask
+        return None
+
+    def _insert(self, entity):
+        # como el set: añadir un id que ya existe no hace nada
+        if entity.id in self._rows:
+            return
+        self._write(self._size, entity, entity.version)
+        self._rows[entity.id] = self._size
+        self._size += 1
+
+    def _write(self, row, entity, version):
+        # primero lo que puede fallar, despues las columnas
+        encoded = entity.name.encode()
+        cost = float(entity.cost)
+        self._ids[row] = np.frombuffer(entity.id.bytes, dtype=np.uint8)
+        self._costs[row] = cost
+        self._versions[row] = version
+        self._name_offsets[row] = len(self._names)
+        self._name_lengths[row] = len(encoded)
+        self._names += encoded
+        self._live_name_bytes += len(encoded)
+
+    def _materialize(self, row):
+        offset = int(self._name_offsets[row])
+        name = self._names[offset:offset + int(self._name_lengths[row])].decode()
+        return Ingredient(uuid.UUID(bytes=self._ids[row].tobytes()), name,
+                          float(self._costs[row]), int(self._versions[row]))
+
+    def _grow(self, needed):
+        capacity = len(self._costs)
+        if needed <= capacity:
+            return
+        capacity = max(capacity, 1)
+        while capacity < needed:
+            capacity *= 2
+        for column in ("_ids", "_costs", "_versions", "_name_offsets", "_name_lengths"):
+            old = getattr(self, column)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, column, new)
+
+    def _compact_names(self):
+        # update y remove dejan nombres viejos en el buffer; lo reescribimos
+        # cuando la basura supera a lo que sigue vivo
+        if len(self._names) < 4096 or len(self._names) < 2 * self._live_name_bytes:
+            return
+        names = bytearray()
+        for row in range(self._size):
+            offset = int(self._name_offsets[row])
+            self._name_offsets[row] = len(names)
+            names += self._names[offset:offset + int(self._name_lengths[row])]
+        self._names = names
+
+
+def _key(id):
+    # uuid.bytes es big endian, asi que (hi, lo) ordena igual que uuid.UUID
+    hi, lo = np.frombuffer(id.bytes, dtype=">u8").astype(np.uint64)
+    return hi, lo
+
+
+def _position(hi, lo, key_hi, key_lo, side):
+    # bisect por hi y, entre los empates, por lo
+    start = int(np.searchsorted(hi, key_hi, "left"))
+    end = int(np.searchsorted(hi, key_hi, "right"))
+    return start + int(np.searchsorted(lo[start:end], key_lo, side))
+
+
+class ConcurrentColumnarIngredientRepository(ColumnarIngredientRepository):
+    """
+    para servidores WSGI con varios hilos: el mismo reparto que
+    Synchronized, lecturas compartidas y escrituras en exclusiva; scan
+    toma el lock en cada bloque
+    """
+
+    def __init__(self, data=(), capacity=1024):
+        self.lock = RWLock()
+        super().__init__(data, capacity)
+
+    def add(self, entity):
+        with self.lock.write():
+            super().add(entity)
+
+    def add_many(self, entities):
+        with self.lock.write():
+            return super().add_many(entities)
+
+    def update(self, entity):
+        with self.lock.write():
+            super().update(entity)
+
+    def remove(self, entity):
+        with self.lock.write():
+            super().remove(entity)
+
+    def find(self, id, message="La entidad no existe"):
+        with self.lock.read():
+            return super().find(id, message)
+
+    def query(self, predicate, page=0, size=10):
+        with self.lock.read():
+            return super().query(predicate, page, size)
+
+    def total_cost(self, predicate=None):
+        with self.lock.read():
+            return super().total_cost(predicate)
+
+    def _chunk(self, after, size):
+        # si dos lectores recalculan el orden a la vez sacan lo mismo y
+        # _order se asigna de una vez
+        with self.lock.read():
+            return super()._chunk(after, size)
+
+
+__all__ = ["ColumnarIngredientRepository", "ConcurrentColumnarIngredientRepository"]
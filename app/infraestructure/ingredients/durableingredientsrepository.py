@@ -0,0 +1,361 @@
+"""
+repositorio de ingredientes que sobrevive a los reinicios
+
+cada add/update/remove se escribe en el WAL y no se devuelve el control
+hasta que esta en disco (group commit); solo entonces se aplica en memoria,
+en el mismo orden que el log, asi un lector nunca ve un cambio que una
+caida se llevaria. Cada snapshot_every registros se guarda, en otro hilo,
+un snapshot binario compacto y se descarta el log que cubre. Al arrancar
+se carga el snapshot con mmap y se reaplica el log encima
+
+formato del snapshot:
+    b"ING3" + n (u64)
+    ids:     n * 16 bytes, en orden
+    costs:   n * float64
+    versions: n * u64
+    offsets: (n + 1) * u64 dentro del bloque de nombres
+    by_cost: n * u32, las filas en orden (coste, id)
+    names:   utf-8 concatenados
+
+con las filas ya en el orden de los indices por id y por coste, el
+arranque los carga sin ordenar; un snapshot b"ING2" (sin by_cost) se
+sigue leyendo
+"""
+import gc
+import mmap
+import os
+import struct
+import threading
+import uuid
+from array import array
+from app.core.wal import WriteAheadLog
+from app.dominio.ingredient.ingredient import Ingredient
+from app.infraestructure.ingredients.ingredientsrepository import ConcurrentIngredientRepository
+
+ADD, UPDATE, REMOVE = 1, 2, 3
+MAGIC = b"ING3"
+MAGIC_V2 = b"ING2"
+COUNT = struct.Struct("<Q")
+FIELDS = struct.Struct("<dQ")
+
+
+def encode(entity: Ingredient, version=None) -> bytes:
+    version = entity.version if version is None else version
+    return entity.id.bytes + FIELDS.pack(entity.cost, version) + entity.name.encode()
+
+
+def decode(payload: bytes) -> Ingredient:
+    cost, version = FIELDS.unpack_from(payload, 16)
+    return Ingredient(
+        uuid.UUID(bytes=payload[:16]),
+        payload[16 + FIELDS.size:].decode(),
+        cost,
+        version,
+    )
+
+
+from_bytes = int.from_bytes
+
+
+def _uuid(value: int, new=object.__new__, set=object.__setattr__, safe=uuid.SafeUUID.unknown):
+    # uuid.UUID(bytes=...) valida y convierte en python, la mitad del tiempo
+    # de leer el snapshot; sus ids ya son validos, asi que ponemos el entero
+    # directamente como hace UUID.__init__
+    result = new(uuid.UUID)
+    set(result, "int", value)
+    set(result, "is_safe", safe)
+    return result
+
+
+def write_snapshot(path, entities, by_cost=None):
+    """
+    entities en orden de id y by_cost sus filas en orden (coste, id), que
+    el repositorio ya tiene en sus indices; sin by_cost se ordena aqui
+    """
+    if by_cost is None:
+        # uuid.bytes es big endian: ordenar por bytes es ordenar como UUID,
+        # sin una llamada a UUID.__lt__ por comparacion; las filas ya van
+        # por id, asi que un sort estable por coste deja los empates por id
+        entities = sorted(entities, key=lambda entity: entity.id.bytes)
+        by_cost = sorted(range(len(entities)), key=lambda row: entities[row].cost)
+    by_cost = array("I", by_cost)
+    ids = b"".join(entity.id.bytes for entity in entities)
+    costs = array("d", (entity.cost for entity in entities))
+    versions = array("Q", (entity.version for entity in entities))
+    names = [entity.name.encode() for entity in entities]
+    offsets = array("Q", [0])
+    for name in names:
+        offsets.append(offsets[-1] + len(name))
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as file:
+        file.write(MAGIC + COUNT.pack(len(entities)))
+        file.write(ids)
+        file.write(costs.tobytes())
+        file.write(versions.tobytes())
+        file.write(offsets.tobytes())
+        file.write(by_cost.tobytes())
+        file.write(b"".join(names))
+        file.flush()
+        os.fsync(file.fileno())
+    # el rename es atomico: o el snapshot anterior o el nuevo, nunca uno a medias
+    os.replace(tmp, path)
+
+
+def read_snapshot(path) -> list[Ingredient]:
+    return load_snapshot(path)[0]
+
+
+def load_snapshot(path) -> tuple[list[Ingredient], array | None]:
+    """
+    las entidades en orden de id y las filas en orden (coste, id); None
+    en vez del orden por coste si el snapshot es del formato anterior
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return [], None
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        if view[:4] not in (MAGIC, MAGIC_V2):
+            raise ValueError(f"{path} no es un snapshot de ingredientes")
+        count = COUNT.unpack_from(view, 4)[0]
+        start = 4 + COUNT.size
+        ids = view[start:start + 16 * count]
+        start += 16 * count
+        costs = array("d")
+        costs.frombytes(view[start:start + 8 * count])
+        start += 8 * count
+        versions = array("Q")
+        versions.frombytes(view[start:start + 8 * count])
+        start += 8 * count
+        offsets = array("Q")
+        offsets.frombytes(view[start:start + 8 * (count + 1)])
+        start += 8 * (count + 1)
+        by_cost = None
+        if view[:4] == MAGIC:
+            by_cost = array("I")
+            by_cost.frombytes(view[start:start + 4 * count])
+            start += 4 * count
+        names = view[start:start + offsets[-1]].decode()
+    if names.isascii():
+        # con ascii los offsets en bytes son offsets en caracteres
+        # y nos ahorramos un decode por fila
+        name_of = lambda row: names[offsets[row]:offsets[row + 1]]
+    else:
+        raw = names.encode()
+        name_of = lambda row: raw[offsets[row]:offsets[row + 1]].decode()
+    entities = [
+        Ingredient(_uuid(from_bytes(ids[16 * row:16 * row + 16], "big")), name_of(row), costs[row], versions[row])
+        for row in range(count)
+    ]
+    return entities, by_cost
+
+
+class DurableIngredientRepository(ConcurrentIngredientRepository):
+    # las escrituras esperan al fsync
+    blocking_io = True
+
+    def __init__(self, directory, snapshot_every=100_000, search_index=False):
+        os.makedirs(directory, exist_ok=True)
+        self._snapshot_path = os.path.join(directory, "ingredients.snapshot")
+        self._wal = WriteAheadLog(os.path.join(directory, "ingredients.wal"))
+        self._snapshot_every = snapshot_every
+        # ordena las escrituras en el log; cada una se lleva un turno y se
+        # aplica en memoria, tras su fsync, cuando le toca
+        self._write_lock = threading.Lock()
+        self._turn = threading.Condition()
+        self._issued = 0
+        self._next = 1
+        # id -> (existe, turno, version) de lo escrito en el log y aun no
+        # aplicado, para validar contra el estado que dejara el log y no
+        # contra la memoria
+        self._intents = {}
+        self._pending = 0
+        # un snapshot a la vez; el automatico va en su propio hilo
+        self._snapshot_lock = threading.Lock()
+        self._snapshotting = None
+        # cargar millones de objetos dispara el gc una y otra vez sin liberar
+        # nada; lo paramos solo durante la carga
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            super().__init__(set(), search_index)
+            self._load(*load_snapshot(self._snapshot_path))
+            self._recover()
+        finally:
+            if enabled:
+                gc.enable()
+
+    def _load(self, entities, by_cost):
+        # como add_many pero sin ordenar: el snapshot ya trae las filas en el
+        # orden del indice por id y, en by_cost, en el del indice por coste
+        self.data.update(entities)
+        self.index.update((entity.id, entity) for entity in entities)
+        for field, secondary in self.indexes.items():
+            if field == "id":
+                secondary.add_many(entities, range(len(entities)))
+            elif field == "cost":
+                secondary.add_many(entities, by_cost)
+            else:
+                secondary.add_many(entities)
+
+    def _recover(self):
+        # el log puede repetir cambios ya incluidos en el snapshot si caimos
+        # entre guardarlo y vaciar el log: reaplicar tiene que ser idempotente
+        for kind, payload in self._wal.replay():
+            if kind == REMOVE:
+                entity = self.index.get(uuid.UUID(bytes=payload))
+                if entity is not None:
+                    super().remove(entity)
+                continue
+            entity = decode(payload)
+            if entity.id in self.index:
+                # la version ya viene en el registro, no hay que subirla
+                super().replace(entity)
+            else:
+                super().add(entity)
+            self._pending += 1
+
+    def add(self, entity):
+        self._log(ADD, super().add, entity)
+
+    def add_many(self, entities):
+        with self._write_lock:
+            # solo se registran los que add_many va a insertar de verdad
+            new = {}
+            for entity in entities:
+                if not self._exists(entity.id):
+                    new.setdefault(entity.id, entity)
+            entities = list(new.values())
+            if not entities:
+                return 0
+            # lo que no se podra aplicar no llega al log
+            self._check(entities)
+            for entity in entities:
+                seq = self._wal.write(ADD, encode(entity))
+            ticket = self._ticket({id: entity.version for id, entity in new.items()})
+            self._pending += len(entities)
+        self._commit(seq, ticket, new, lambda: super(DurableIngredientRepository, self).add_many(entities))
+        self._maybe_snapshot()
+        return len(entities)
+
+    def update(self, entity):
+        self._log(UPDATE, super().update, entity)
+
+    def remove(self, entity):
+        self._log(REMOVE, super().remove, entity)
+
+    def snapshot(self):
+        with self._snapshot_lock:
+            with self._write_lock:
+                # lo que ya esta en el log tiene que estar en el snapshot
+                # antes de apartarlo
+                with self._turn:
+                    self._turn.wait_for(lambda: self._next > self._issued)
+                # copiar las referencias basta como vista fija: update cambia
+                # la entidad guardada por otra, no la modifica. Los indices
+                # ya tienen los dos ordenes del snapshot; con el lock solo
+                # copias que no llaman a UUID.__hash__ (dict copia los hash)
+                with self.lock.read():
+                    index = dict(self.index)
+                    by_id = list(self.indexes["id"].ids_after())
+                    by_cost = list(self.indexes["cost"].ids_after())
+                self._wal.rotate()
+                self._pending = 0
+            # escribir el catalogo entero ya no para a los escritores; si
+            # falla, el log apartado sigue ahi para el siguiente intento
+            entities = [index[id] for id in by_id]
+            rows = {id: row for row, id in enumerate(by_id)}
+            write_snapshot(self._snapshot_path, entities, [rows[id] for id in by_cost])
+            self._wal.drop_rotated()
+
+    def close(self):
+        snapshotting = self._snapshotting
+        if snapshotting is not None:
+            snapshotting.join()
+        self._wal.close()
+
+    def _log(self, kind, apply, entity):
+        with self._write_lock:
+            exists = self._exists(entity.id)
+            # igual que set.remove, pero antes de que el cambio llegue al log
+            if kind != ADD and not exists:
+                raise KeyError(entity.id)
+            # add ignora los ids que ya estan: no hay nada que registrar
+            if kind == ADD and exists:
+                return
+            if kind != REMOVE:
+                # lo que no se podra aplicar no llega al log
+                self._check([entity])
+            version = None
+            if kind == REMOVE:
+                payload = entity.id.bytes
+            elif kind == UPDATE:
+                # la que le pondra update al aplicarse: la ultima del log + 1
+                version = self._version(entity.id) + 1
+                payload = encode(entity, version)
+            else:
+                version = entity.version
+                payload = encode(entity)
+            seq = self._wal.write(kind, payload)
+            ticket = self._ticket({entity.id: version})
+            self._pending += 1
+        self._commit(seq, ticket, (entity.id,), lambda: apply(entity))
+        self._maybe_snapshot()
+
+    def _exists(self, id):
+        intent = self._intents.get(id)
+        return id in self.index if intent is None else intent[0]
+
+    def _version(self, id):
+        intent = self._intents.get(id)
+        return self.index[id].version if intent is None else intent[2]
+
+    def _ticket(self, versions):
+        # versions: id -> version que deja el registro, None si lo borra
+        self._issued += 1
+        for id, version in versions.items():
+            self._intents[id] = (version is not None, self._issued, version)
+        return self._issued
+
+    def _commit(self, seq, ticket, ids, apply):
+        # si el fsync falla no se aplica: quien llama recibe el error y la
+        # memoria sigue sin el cambio
+        try:
+            self._wal.sync(seq)
+        except BaseException:
+            self._advance(ticket, ids, None)
+            raise
+        self._advance(ticket, ids, apply)
+
+    def _advance(self, ticket, ids, apply):
+        with self._turn:
+            self._turn.wait_for(lambda: self._next == ticket)
+            try:
+                if apply is not None:
+                    apply()
+            finally:
+                self._next += 1
+                self._turn.notify_all()
+        # ya aplicado: si nadie ha escrito despues sobre el id, la memoria
+        # vuelve a ser la referencia
+        with self._write_lock:
+            for id in ids:
+                if self._intents.get(id, (None, None, None))[1] == ticket:
+                    del self._intents[id]
+
+    def _maybe_snapshot(self):
+        # en otro hilo: el escritor que llega al limite no espera a que se
+        # reescriba el catalogo
+        with self._write_lock:
+            if self._pending < self._snapshot_every or self._snapshotting is not None:
+                return
+            self._snapshotting = threading.Thread(target=self._background_snapshot, daemon=True)
+            self._snapshotting.start()
+
+    def _background_snapshot(self):
+        try:
+            self.snapshot()
+        finally:
+            with self._write_lock:
+                self._snapshotting = None
+
+
+__all__ = ["DurableIngredientRepository"]
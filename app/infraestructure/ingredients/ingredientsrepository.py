@@ -1,20 +1,98 @@
-from app.core.repository import Add, Update, Remove
+import os
+from app.core.asyncrepository import AsyncRepository
+from app.core.cachedrepository import CachedRepository
+from app.core.metrics import MeteredRepository
+from app.core.indexes import HashIndex, SortedIndex
+from app.core.searchindex import SearchIndex, scan_search
+from app.core.repository import Add, Update, Remove, Query, Synchronized
 from app.dominio.ingredient.ingredient import Ingredient
 
 
-class IngredientRepository(Add, Update, Remove):
-    def __init__(self, data: set[Ingredient]):
-        super().__init__(data)
+class IngredientRepository(Add, Update, Remove, Query):
+    def __init__(self, data: set[Ingredient], search_index=False):
+        indexes = {
+            "id": SortedIndex("id"),
+            "name": HashIndex("name"),
+            "cost": SortedIndex("cost"),
+        }
+        if search_index:
+            # rapido pero ~1 KB por entidad, ver SearchIndex
+            indexes["name_search"] = SearchIndex("name")
+        super().__init__(data, indexes)
 
-    def query(self, predicate, page=0, size=10):
-        filtered_data = [item for item in self.data if predicate(item)]
+    def search(self, text, limit=10):
+        index = self.indexes.get("name_search")
+        if index is None:
+            return scan_search(self.scan(), text, limit)
+        return [self.index[id] for id in index.search(text, limit)]
 
-        start_index = page * size
-        end_index = start_index + size
 
-        return filtered_data[start_index:end_index]
+class ConcurrentIngredientRepository(Synchronized, IngredientRepository):
+    """para servidores WSGI con varios hilos"""
 
+    def search(self, text, limit=10):
+        if "name_search" not in self.indexes:
+            # scan ya lee por bloques con el lock
+            return super().search(text, limit)
+        with self.lock.read():
+            return super().search(text, limit)
 
-ingredient_repository = IngredientRepository(set())
 
-__all__ = ["ingredient_repository"]
+def build_repository():
+    """
+    INGREDIENTS_STORAGE elige el almacen: memory, durable, sqlite, shared
+    o columnar (en memoria por columnas, necesita numpy)
+    INGREDIENTS_DATA_DIR es el directorio de durable y sqlite; si solo
+    se da el directorio se usa durable
+    INGREDIENTS_CACHE_SIZE y INGREDIENTS_CACHE_TTL (segundos) ponen un
+    LRU delante de find; por defecto solo con sqlite, que va a disco
+    memory y durable mantienen un SearchIndex para /ingredients/search;
+    INGREDIENTS_SEARCH_INDEX=0 lo quita (ahorra ~1 KB por ingrediente) y
+    la busqueda recorre el catalogo
+    """
+    directory = os.environ.get("INGREDIENTS_DATA_DIR")
+    storage = os.environ.get("INGREDIENTS_STORAGE", "durable" if directory else "memory")
+    repository = build_storage(storage, directory)
+    cache_size = int(os.environ.get("INGREDIENTS_CACHE_SIZE", 10_000 if storage == "sqlite" else 0))
+    if cache_size:
+        ttl = os.environ.get("INGREDIENTS_CACHE_TTL")
+        repository = CachedRepository(repository, cache_size, float(ttl) if ttl else None)
+    return MeteredRepository(repository, "ingredients")
+
+
+def build_storage(storage, directory):
+    search_index = os.environ.get("INGREDIENTS_SEARCH_INDEX", "1") != "0"
+    if storage == "durable":
+        from app.infraestructure.ingredients.durableingredientsrepository import (
+            DurableIngredientRepository,
+        )
+        return DurableIngredientRepository(directory or "data", search_index=search_index)
+    if storage == "sqlite":
+        from app.infraestructure.ingredients.sqliteingredientsrepository import (
+            SqliteIngredientRepository,
+        )
+        os.makedirs(directory or "data", exist_ok=True)
+        return SqliteIngredientRepository(os.path.join(directory or "data", "ingredients.db"))
+    if storage == "shared":
+        # un solo catalogo para todos los workers de un servidor prefork
+        from app.infraestructure.ingredients.sharedingredientsrepository import (
+            SharedIngredientRepository,
+        )
+        return SharedIngredientRepository(
+            os.environ.get("INGREDIENTS_SHM_NAME", "ingredients"),
+            int(os.environ.get("INGREDIENTS_SHM_CAPACITY", 1_000_000)),
+        )
+    if storage == "columnar":
+        from app.infraestructure.ingredients.columnaringredientsrepository import (
+            ConcurrentColumnarIngredientRepository,
+        )
+        return ConcurrentColumnarIngredientRepository()
+    if storage != "memory":
+        raise ValueError(f"INGREDIENTS_STORAGE desconocido: {storage}")
+    return ConcurrentIngredientRepository(set(), search_index)
+
+
+ingredient_repository = build_repository()
+async_ingredient_repository = AsyncRepository(ingredient_repository)
+
+__all__ = ["ingredient_repository", "async_ingredient_repository"]
@@ -0,0 +1,540 @@
+"""
+catalogo de ingredientes en memoria compartida entre procesos
+
+con un servidor prefork cada worker tendria su propio set; aqui todos se
+enganchan al mismo bloque de multiprocessing.shared_memory por nombre:
+
+    cabecera (64 bytes): magic, capacity, count, seq, tombstones, blocks, free
+    tabla hash: 2 * capacity huecos int64 con la fila (-1 vacio, -2 borrado)
+    orden por id: como SortedList, bloques de hasta BLOCK filas ordenadas
+        por id; un directorio con los bloques en orden, una pila de bloques
+        libres y los bloques (cuantas filas + las filas)
+    registros: capacity filas fijas de RECORD, densas en [0, count)
+
+los escritores se excluyen con un flock sobre un fichero (entre procesos)
+y un threading.Lock (entre hilos, flock no distingue hilos del mismo
+proceso). Los lectores no bloquean: seq es un seqlock, impar mientras se
+escribe; se lee, se comprueba que seq no ha cambiado y si no se repite
+
+si un proceso muere a mitad de escribir seq se queda impar; el flock se
+suelta al morir, asi que un lector que lleva STALE_WRITER segundos
+esperando toma el lock y, si seq sigue igual, rehace la tabla hash y el
+orden desde las filas
+"""
+import fcntl
+import os
+import struct
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from itertools import islice
+from multiprocessing import resource_tracker, shared_memory
+from app.core.notfoundexception import NotFoundException
+from app.core.searchindex import scan_search
+from app.core.storagelimitexception import StorageLimitException
+from app.dominio.ingredient.ingredient import Ingredient
+
+MAGIC = b"INGSHM02"
+CAPACITY, COUNT, SEQ, TOMBSTONES, BLOCKS, FREE = 8, 16, 24, 32, 40, 48
+HEADER_SIZE = 64
+U64 = struct.Struct("<Q")
+I64 = struct.Struct("<q")
+EMPTY, TOMBSTONE = -1, -2
+NAME_SIZE = 64
+RECORD = struct.Struct(f"<16sdQH{NAME_SIZE}s")
+BLOCK = 512
+BLOCK_SIZE = I64.size * (BLOCK + 1)
+# al rehacer el orden los bloques se llenan hasta aqui, con hueco para crecer
+FILL = BLOCK * 3 // 4
+SCAN_CHUNK = 64
+STALE_WRITER = 1.0
+
+
+def _untrack(shm):
+    # en 3.11 el resource_tracker de cada proceso que se engancha borra el
+    # bloque al salir; el catalogo lo borra quien llame a unlink()
+    resource_tracker.unregister(shm._name, "shared_memory")
+
+
+class SharedIngredientRepository:
+    def __init__(self, name, capacity=1_000_000):
+        self._thread_lock = threading.Lock()
+        self._lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self._lock_file = None
+        with self._locked():
+            try:
+                size = self._layout(capacity)
+                self._shm = shared_memory.SharedMemory(name, create=True, size=size)
+                created = True
+            except FileExistsError:
+                self._shm = shared_memory.SharedMemory(name)
+                created = False
+            _untrack(self._shm)
+            self._buf = self._shm.buf
+            if created:
+                U64.pack_into(self._buf, CAPACITY, capacity)
+            elif bytes(self._buf[0:8]) != MAGIC:
+                raise ValueError(f"{name} no es un catalogo de ingredientes")
+            self._layout(U64.unpack_from(self._buf, CAPACITY)[0])
+            if created:
+                self._buf[HEADER_SIZE:self._directory] = b"\xff" * (self._directory - HEADER_SIZE)
+                self._rebuild_order()
+                self._buf[0:8] = MAGIC
+
+    def __len__(self):
+        return self._get(COUNT)
+
+    def add(self, entity: Ingredient):
+        name = self._name(entity)
+        with self._locked(), self._writing():
+            self._add(entity, name)
+
+    def add_many(self, entities: list[Ingredient]):
+        # se comprueba todo antes de escribir, asi un lote que no cabe no
+        # se queda a medias
+        names = [self._name(entity) for entity in entities]
+        with self._locked():
+            new = {entity.id for entity in entities if self._probe(entity.id.bytes)[1] is None}
+            self._check_capacity(len(new))
+            # un lote grande frente a lo que ya hay se ordena todo al final;
+            # mientras tanto find ya ve las filas nuevas y scan todavia no
+            rebuild = len(new) > self._get(COUNT) // 8
+            for entity, name in zip(entities, names):
+                with self._writing():
+                    self._add(entity, name, ordered=not rebuild)
+            if rebuild:
+                with self._writing():
+                    self._rebuild_order()
+        return len(new)
+
+    def find(self, id, message="La entidad no existe"):
+        key = id.bytes
+        while True:
+            seq = self._stable_seq()
+            try:
+                _, row = self._probe(key)
+                record = None if row is None else RECORD.unpack_from(self._buf, self._offset(row))
+            except (struct.error, IndexError):
+                # lectura a medias de un escritor, seq habra cambiado
+                record = None
+            if self._get(SEQ) == seq:
+                break
+        if record is None:
+            raise NotFoundException(message)
+        return self._entity(record)
+
+    def update(self, entity: Ingredient):
+        name = self._name(entity)
+        with self._locked():
+            _, row = self._probe(entity.id.bytes)
+            if row is None:
+                raise KeyError(entity.id)
+            version = RECORD.unpack_from(self._buf, self._offset(row))[2] + 1
+            with self._writing():
+                self._write(row, entity, version, name)
+        entity.bump_version(version)
+
+    def remove(self, entity):
+        with self._locked():
+            slot, row = self._probe(entity.id.bytes)
+            if row is None:
+                raise KeyError(entity.id)
+            last = self._get(COUNT) - 1
+            with self._writing():
+                self._set_slot(slot, TOMBSTONE)
+                self._put(TOMBSTONES, self._get(TOMBSTONES) + 1)
+                self._order_remove(entity.id.bytes)
+                if row != last:
+                    # la ultima fila pasa al hueco para que las filas sigan densas
+                    start = self._offset(last)
+                    self._buf[self._offset(row):self._offset(row) + RECORD.size] = \
+                        self._buf[start:start + RECORD.size]
+                    moved = self._key(row)
+                    slot, _ = self._probe(moved)
+                    self._set_slot(slot, row)
+                    self._order_move(moved, row)
+                self._put(COUNT, last)
+                if self._get(TOMBSTONES) > self._capacity // 2:
+                    self._rehash()
+
+    def query(self, predicate, page=0, size=10):
+        start_index = page * size
+        matches = (e for e in self._rows() if predicate(e))
+        return list(islice(matches, start_index, start_index + size))
+
+    def scan(self, after=None, predicate=None, field="id"):
+        if field != "id":
+            raise ValueError("la memoria compartida solo recorre por id")
+        # keyset sobre el orden por id: cada bloque de SCAN_CHUNK se lee
+        # con el seqlock y se continua desde el ultimo id
+        while True:
+            chunk = self._read_after(None if after is None else after.bytes, SCAN_CHUNK)
+            for entity in chunk:
+                if predicate is None or predicate(entity):
+                    yield entity
+            if len(chunk) < SCAN_CHUNK:
+                return
+            after = chunk[-1].id
+
+    def search(self, text, limit=10):
+        # sin indice de texto en la memoria compartida: se recorre por bloques
+        return scan_search(self.scan(), text, limit)
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+
+    def unlink(self):
+        # unlink le quita el registro al tracker, que se lo habiamos quitado
+        resource_tracker.register(self._shm._name, "shared_memory")
+        self._shm.unlink()
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            # un hijo de fork comparte el fichero abierto y con el el flock:
+            # cada proceso abre el suyo para que se excluyan de verdad
+            if self._lock_file is None or self._lock_pid != os.getpid():
+                self._lock_file = open(self._lock_path, "a+b")
+                self._lock_pid = os.getpid()
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def _writing(self):
+        self._begin()
+        try:
+            yield
+        except BaseException:
+            # un error a mitad deja el bloque a medias: se rehace desde las filas
+            self._repair()
+            raise
+        finally:
+            self._end()
+
+    def _add(self, entity, name, ordered=True):
+        # como el set: añadir un id que ya existe no hace nada
+        slot, row = self._probe(entity.id.bytes)
+        if row is not None:
+            return
+        self._check_capacity(1)
+        count = self._get(COUNT)
+        self._write(count, entity, entity.version, name)
+        if I64.unpack_from(self._buf, HEADER_SIZE + slot * I64.size)[0] == TOMBSTONE:
+            self._put(TOMBSTONES, self._get(TOMBSTONES) - 1)
+        self._set_slot(slot, count)
+        self._put(COUNT, count + 1)
+        if ordered:
+            self._order_insert(entity.id.bytes, count)
+
+    def _probe(self, key):
+        """(hueco, fila) del id; si no esta, (hueco donde insertarlo, None)"""
+        slot = int.from_bytes(key[8:], "little") % self._slots
+        free = None
+        for _ in range(self._slots):
+            row = I64.unpack_from(self._buf, HEADER_SIZE + slot * I64.size)[0]
+            if row == EMPTY:
+                return (slot if free is None else free), None
+            if row == TOMBSTONE:
+                if free is None:
+                    free = slot
+            elif self._buf[self._offset(row):self._offset(row) + 16] == key:
+                return slot, row
+            slot = (slot + 1) % self._slots
+        return free, None
+
+    def _rehash(self):
+        self._buf[HEADER_SIZE:self._directory] = b"\xff" * (self._directory - HEADER_SIZE)
+        for row in range(self._get(COUNT)):
+            slot, _ = self._probe(self._key(row))
+            self._set_slot(slot, row)
+        self._put(TOMBSTONES, 0)
+
+    def _repair(self):
+        """
+        rehace el catalogo desde las filas tras una escritura a medias: un
+        remove cortado puede dejar la misma fila dos veces, un add cortado
+        no ha llegado a contar su fila
+        """
+        seen = set()
+        count = self._get(COUNT)
+        row = 0
+        while row < count:
+            key = self._key(row)
+            if key not in seen:
+                seen.add(key)
+                row += 1
+                continue
+            count -= 1
+            if row != count:
+                start = self._offset(count)
+                self._buf[self._offset(row):self._offset(row) + RECORD.size] = \
+                    self._buf[start:start + RECORD.size]
+        self._put(COUNT, count)
+        self._rehash()
+        self._rebuild_order()
+
+    # orden por id: directorio de bloques, cada uno con sus filas por id
+
+    def _order_insert(self, key, row):
+        blocks = self._get(BLOCKS)
+        if blocks == 0:
+            block = self._allocate()
+            self._set_directory(0, block)
+            self._put(BLOCKS, 1)
+            position, index = 0, 0
+        else:
+            position, index = self._locate(key)
+            if position == blocks:
+                # mayor que todos: al final del ultimo bloque
+                position -= 1
+                index = self._count(self._directory_at(position))
+            block = self._directory_at(position)
+        if self._count(block) == BLOCK:
+            new = self._allocate()
+            if new is None:
+                # sin bloques libres: se rehace compacto, la fila ya esta contada
+                self._rebuild_order()
+                return
+            half = BLOCK // 2
+            self._buf[self._entry(new, 0):self._entry(new, half)] = \
+                self._buf[self._entry(block, half):self._entry(block, BLOCK)]
+            self._set_count(new, half)
+            self._set_count(block, half)
+            self._shift_directory(position + 1, 1)
+            self._set_directory(position + 1, new)
+            if index > half:
+                block, index = new, index - half
+        count = self._count(block)
+        self._buf[self._entry(block, index + 1):self._entry(block, count + 1)] = \
+            self._buf[self._entry(block, index):self._entry(block, count)]
+        I64.pack_into(self._buf, self._entry(block, index), row)
+        self._set_count(block, count + 1)
+
+    def _order_remove(self, key):
+        position, index = self._locate(key)
+        block = self._directory_at(position)
+        count = self._count(block) - 1
+        self._buf[self._entry(block, index):self._entry(block, count)] = \
+            self._buf[self._entry(block, index + 1):self._entry(block, count + 1)]
+        self._set_count(block, count)
+        if count == 0:
+            self._shift_directory(position + 1, -1)
+            self._release(block)
+
+    def _order_move(self, key, row):
+        position, index = self._locate(key)
+        I64.pack_into(self._buf, self._entry(self._directory_at(position), index), row)
+
+    def _rebuild_order(self):
+        rows = sorted(range(self._get(COUNT)), key=self._key)
+        blocks = (len(rows) + FILL - 1) // FILL
+        for position in range(blocks):
+            chunk = rows[position * FILL:(position + 1) * FILL]
+            for index, row in enumerate(chunk):
+                I64.pack_into(self._buf, self._entry(position, index), row)
+            self._set_count(position, len(chunk))
+            self._set_directory(position, position)
+        self._put(BLOCKS, blocks)
+        # pila de libres: los que no se han usado
+        free = range(self._block_count - 1, blocks - 1, -1)
+        for depth, block in enumerate(free):
+            I64.pack_into(self._buf, self._free + depth * I64.size, block)
+        self._put(FREE, len(free))
+
+    def _locate(self, key, after=False):
+        """
+        (posicion en el directorio, indice en el bloque) del primer id >= key,
+        o > key con after; la posicion es BLOCKS si no hay ninguno
+        """
+        low, high = 0, min(self._get(BLOCKS), self._block_count)
+        while low < high:
+            middle = (low + high) // 2
+            block = self._directory_at(middle)
+            last = self._key(self._row_at(block, self._count(block) - 1))
+            if last < key or (after and last == key):
+                low = middle + 1
+            else:
+                high = middle
+        if low == self._get(BLOCKS):
+            return low, 0
+        block = self._directory_at(low)
+        first, high = 0, min(self._count(block), BLOCK)
+        while first < high:
+            middle = (first + high) // 2
+            current = self._key(self._row_at(block, middle))
+            if current < key or (after and current == key):
+                first = middle + 1
+            else:
+                high = middle
+        return low, first
+
+    def _read_after(self, key, size):
+        while True:
+            seq = self._stable_seq()
+            try:
+                records = self._records_after(key, size)
+            except (struct.error, IndexError, ValueError):
+                # lectura a medias de un escritor, seq habra cambiado
+                records = None
+            if self._get(SEQ) == seq and records is not None:
+                return [self._entity(record) for record in records]
+
+    def _records_after(self, key, size):
+        if key is None:
+            position, index = 0, 0
+        else:
+            position, index = self._locate(key, after=True)
+        records = []
+        blocks = min(self._get(BLOCKS), self._block_count)
+        while position < blocks and len(records) < size:
+            block = self._directory_at(position)
+            stop = min(self._count(block), index + size - len(records), BLOCK)
+            for index in range(index, stop):
+                records.append(RECORD.unpack_from(self._buf, self._offset(self._row_at(block, index))))
+            position, index = position + 1, 0
+        return records
+
+    def _allocate(self):
+        free = self._get(FREE)
+        if free == 0:
+            return None
+        self._put(FREE, free - 1)
+        return I64.unpack_from(self._buf, self._free + (free - 1) * I64.size)[0]
+
+    def _release(self, block):
+        free = self._get(FREE)
+        I64.pack_into(self._buf, self._free + free * I64.size, block)
+        self._put(FREE, free + 1)
+
+    def _shift_directory(self, position, delta):
+        # mueve el directorio desde position un hueco a la derecha (+1) o a la izquierda (-1)
+        blocks = self._get(BLOCKS)
+        start = self._directory + position * I64.size
+        end = self._directory + blocks * I64.size
+        self._buf[start + delta * I64.size:end + delta * I64.size] = self._buf[start:end]
+        self._put(BLOCKS, blocks + delta)
+
+    def _directory_at(self, position):
+        return I64.unpack_from(self._buf, self._directory + position * I64.size)[0]
+
+    def _set_directory(self, position, block):
+        I64.pack_into(self._buf, self._directory + position * I64.size, block)
+
+    def _count(self, block):
+        return I64.unpack_from(self._buf, self._blocks + block * BLOCK_SIZE)[0]
+
+    def _set_count(self, block, count):
+        I64.pack_into(self._buf, self._blocks + block * BLOCK_SIZE, count)
+
+    def _entry(self, block, index):
+        return self._blocks + block * BLOCK_SIZE + (index + 1) * I64.size
+
+    def _row_at(self, block, index):
+        return I64.unpack_from(self._buf, self._entry(block, index))[0]
+
+    def _key(self, row):
+        start = self._offset(row)
+        return bytes(self._buf[start:start + 16])
+
+    def _rows(self):
+        row = 0
+        while True:
+            entity = self._read_row(row)
+            if entity is None:
+                return
+            yield entity
+            row += 1
+
+    def _read_row(self, row):
+        while True:
+            seq = self._stable_seq()
+            record = None
+            if row < self._get(COUNT):
+                record = RECORD.unpack_from(self._buf, self._offset(row))
+            if self._get(SEQ) == seq:
+                return None if record is None else self._entity(record)
+
+    def _stable_seq(self):
+        waiting = None
+        while True:
+            seq = self._get(SEQ)
+            if not seq & 1:
+                return seq
+            if waiting is None:
+                waiting = time.monotonic()
+            elif time.monotonic() - waiting > STALE_WRITER:
+                self._recover(seq)
+                waiting = None
+            time.sleep(0)
+
+    def _recover(self, seq):
+        # con el lock tomado no queda ningun escritor vivo: si seq no se ha
+        # movido, el que lo dejo impar murio a mitad de escribir
+        with self._locked():
+            if self._get(SEQ) == seq:
+                self._repair()
+                self._end()
+
+    def _layout(self, capacity):
+        """calcula donde empieza cada zona y devuelve el tamano total"""
+        self._capacity = capacity
+        self._slots = 2 * capacity
+        # cada bloque se parte al llenarse y queda al menos a la mitad
+        self._block_count = capacity // (BLOCK // 2) + 2
+        self._directory = HEADER_SIZE + self._slots * I64.size
+        self._free = self._directory + self._block_count * I64.size
+        self._blocks = self._free + self._block_count * I64.size
+        self._records = self._blocks + self._block_count * BLOCK_SIZE
+        return self._records + capacity * RECORD.size
+
+    def _check_capacity(self, new):
+        if self._get(COUNT) + new > self._capacity:
+            raise StorageLimitException(
+                f"catalogo compartido lleno ({self._capacity} ingredientes)", 507
+            )
+
+    @staticmethod
+    def _name(entity):
+        # se valida antes de _begin: un error con seq impar bloquearia a los lectores
+        name = entity.name.encode()
+        if len(name) > NAME_SIZE:
+            raise StorageLimitException(f"nombre de mas de {NAME_SIZE} bytes: {entity.name}")
+        return name
+
+    def _write(self, row, entity, version, name):
+        RECORD.pack_into(self._buf, self._offset(row), entity.id.bytes, entity.cost,
+                         version, len(name), name)
+
+    def _begin(self):
+        self._put(SEQ, self._get(SEQ) + 1)
+
+    def _end(self):
+        self._put(SEQ, self._get(SEQ) + 1)
+
+    def _offset(self, row):
+        return self._records + row * RECORD.size
+
+    def _set_slot(self, slot, row):
+        I64.pack_into(self._buf, HEADER_SIZE + slot * I64.size, row)
+
+    def _get(self, offset):
+        return U64.unpack_from(self._buf, offset)[0]
+
+    def _put(self, offset, value):
+        U64.pack_into(self._buf, offset, value)
+
+    @staticmethod
+    def _entity(record):
+        id, cost, version, length, name = record
+        return Ingredient(uuid.UUID(bytes=id), name[:length].decode(), cost, version)
+
+
+__all__ = ["SharedIngredientRepository"]
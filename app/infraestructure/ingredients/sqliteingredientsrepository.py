@@ -0,0 +1,217 @@
+"""
+repositorio de ingredientes sobre sqlite, para catalogos que no caben en RAM
+
+    - un pool acotado de conexiones (LifoQueue); cada operacion toma una
+      y la devuelve, ninguna conexion la usan dos hilos a la vez
+    - journal en modo WAL: los lectores no bloquean al escritor
+    - sqlite3 cachea las sentencias preparadas por conexion (cached_statements)
+    - add_many con executemany en una sola transaccion
+    - indices sobre name y cost para los predicados estructurados
+"""
+import queue
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from itertools import islice
+from app.core.notfoundexception import NotFoundException
+from app.dominio.ingredient.ingredient import Ingredient
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingredients (
+    id BLOB PRIMARY KEY,
+    name TEXT NOT NULL,
+    cost REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ingredients_name ON ingredients (name);
+CREATE INDEX IF NOT EXISTS ingredients_cost ON ingredients (cost);
+"""
+INSERT = "INSERT OR IGNORE INTO ingredients (id, name, cost, version) VALUES (?, ?, ?, ?)"
+SELECT = "SELECT id, name, cost, version FROM ingredients"
+COLUMNS = {"id", "name", "cost"}
+
+
+class SqliteIngredientRepository:
+    SCAN_CHUNK = 256
+    blocking_io = True
+
+    def __init__(self, path, cached_statements=256, pool_size=8):
+        self._path = path
+        self._cached_statements = cached_statements
+        # pool acotado: el servidor con hilos abre un hilo por conexion de
+        # cliente, con threading.local seria una conexion sqlite por cada uno
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._pool_size = pool_size
+        self._opened = 0
+        self._open_lock = threading.Lock()
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def add(self, entity: Ingredient):
+        with self._connection() as connection, connection:
+            connection.execute(INSERT, self._row(entity))
+
+    def add_many(self, entities: list[Ingredient]):
+        with self._connection() as connection, connection:
+            # INSERT OR IGNORE: rowcount son solo las filas nuevas
+            return connection.executemany(INSERT, map(self._row, entities)).rowcount
+
+    def find(self, id, message="La entidad no existe"):
+        with self._connection() as connection:
+            row = connection.execute(f"{SELECT} WHERE id = ?", (id.bytes,)).fetchone()
+        if row is None:
+            raise NotFoundException(message)
+        return self._entity(row)
+
+    def update(self, entity: Ingredient):
+        with self._connection() as connection, connection:
+            cursor = connection.execute(
+                "UPDATE ingredients SET name = ?, cost = ?, version = version + 1 WHERE id = ?",
+                (entity.name, entity.cost, entity.id.bytes),
+            )
+            # igual que set.remove en el repositorio en memoria
+            if not cursor.rowcount:
+                raise KeyError(entity.id)
+            # dentro de la misma transaccion: la version es la que hemos escrito
+            (version,) = connection.execute(
+                "SELECT version FROM ingredients WHERE id = ?", (entity.id.bytes,)
+            ).fetchone()
+        entity.bump_version(version)
+
+    def remove(self, entity):
+        with self._connection() as connection, connection:
+            cursor = connection.execute("DELETE FROM ingredients WHERE id = ?", (entity.id.bytes,))
+        if not cursor.rowcount:
+            raise KeyError(entity.id)
+
+    def query(self, predicate, page=0, size=10):
+        where = self._where(predicate)
+        with self._connection() as connection:
+            if where is None:
+                rows = connection.execute(SELECT)
+                matches = (e for e in map(self._entity, rows) if predicate(e))
+                start_index = page * size
+                return list(islice(matches, start_index, start_index + size))
+            sql, params = where
+            rows = connection.execute(
+                f"{SELECT} WHERE {sql} LIMIT ? OFFSET ?", (*params, size, page * size)
+            )
+            return [self._entity(row) for row in rows]
+
+    def search(self, text, limit=10):
+        # sin indice de texto: prefijo del nombre o de una palabra, los cortos
+        # primero; LIKE ignora mayusculas pero no acentos
+        text = text.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        if not text:
+            return []
+        with self._connection() as connection:
+            rows = connection.execute(
+                f"{SELECT} WHERE name LIKE ? ESCAPE '\\' OR name LIKE ? ESCAPE '\\' "
+                "ORDER BY name NOT LIKE ? ESCAPE '\\', length(name) LIMIT ?",
+                (f"{text}%", f"% {text}%", f"{text}%", limit),
+            ).fetchall()
+        return [self._entity(row) for row in rows]
+
+    def scan(self, after=None, predicate=None, field="id"):
+        if field != "id":
+            raise ValueError("sqlite solo recorre por id")
+        # keyset por la clave primaria, leyendo por bloques; la conexion
+        # vuelve al pool entre bloque y bloque
+        last = b"" if after is None else after.bytes
+        while True:
+            with self._connection() as connection:
+                rows = connection.execute(
+                    f"{SELECT} WHERE id > ? ORDER BY id LIMIT ?", (last, self.SCAN_CHUNK)
+                ).fetchall()
+            for row in rows:
+                entity = self._entity(row)
+                if predicate is None or predicate(entity):
+                    yield entity
+            if len(rows) < self.SCAN_CHUNK:
+                return
+            last = rows[-1][0]
+
+    def close(self):
+        # cierra las que estan en el pool; las que esten en uso vuelven despues
+        while True:
+            try:
+                connection = self._pool.get_nowait()
+            except queue.Empty:
+                return
+            connection.close()
+            with self._open_lock:
+                self._opened -= 1
+
+    @contextmanager
+    def _connection(self):
+        connection = self._checkout()
+        try:
+            yield connection
+        finally:
+            self._pool.put(connection)
+
+    def _checkout(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._open_lock:
+            opened = self._opened < self._pool_size
+            if opened:
+                self._opened += 1
+        if not opened:
+            # todas en uso: se espera a que vuelva una
+            return self._pool.get()
+        try:
+            connection = sqlite3.connect(
+                self._path,
+                cached_statements=self._cached_statements,
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.Error:
+            with self._open_lock:
+                self._opened -= 1
+            raise
+        return connection
+
+    def _where(self, predicate):
+        # traduce Eq/Range/Prefix/And a sql; None si hay que filtrar en python
+        op = getattr(predicate, "op", None)
+        if op == "and":
+            parts = [self._where(p) for p in predicate.predicates]
+            if not parts or any(part is None for part in parts):
+                return None
+            return (" AND ".join(sql for sql, _ in parts),
+                    [param for _, params in parts for param in params])
+        field = getattr(predicate, "field", None)
+        if field not in COLUMNS:
+            return None
+        value = (lambda v: v.bytes) if field == "id" else (lambda v: v)
+        if op == "eq":
+            return f"{field} = ?", [value(predicate.value)]
+        if op == "range":
+            sql, params = [], []
+            if predicate.low is not None:
+                sql.append(f"{field} >= ?")
+                params.append(value(predicate.low))
+            if predicate.high is not None:
+                sql.append(f"{field} <= ?")
+                params.append(value(predicate.high))
+            return " AND ".join(sql) or "1", params
+        if op == "prefix" and field == "name":
+            return "name >= ? AND name < ?", [predicate.value, predicate.value + "\U0010ffff"]
+        return None
+
+    @staticmethod
+    def _row(entity):
+        return entity.id.bytes, entity.name, entity.cost, entity.version
+
+    @staticmethod
+    def _entity(row):
+        return Ingredient(uuid.UUID(bytes=row[0]), row[1], row[2], row[3])
+
+
+__all__ = ["SqliteIngredientRepository"]
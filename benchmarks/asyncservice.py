@@ -0,0 +1,64 @@
+"""
+servicio de consulta sync contra async con un almacen que tarda en responder
+ejecutar: python -m benchmarks.asyncservice
+"""
+import asyncio
+import time
+import uuid
+from app.dominio.ingredient.ingredient import Ingredient
+from app.features.ingredients.queries.get import AsyncService, Service
+from app.infraestructure.ingredients.ingredientsrepository import IngredientRepository
+
+LATENCY = 0.005
+
+
+class LatencyRepository:
+    """simula un almacen remoto: cada find tarda LATENCY segundos"""
+    def __init__(self, repository):
+        self._repository = repository
+
+    def find(self, id, message="La entidad no existe"):
+        time.sleep(LATENCY)
+        return self._repository.find(id, message)
+
+
+class AsyncLatencyRepository:
+    def __init__(self, repository):
+        self._repository = repository
+
+    async def find(self, id, message="La entidad no existe"):
+        await asyncio.sleep(LATENCY)
+        return self._repository.find(id, message)
+
+
+def main():
+    repository = IngredientRepository(set())
+    ids = []
+    for i in range(100):
+        ingredient = Ingredient.create(uuid.uuid4(), f"ingrediente {i}", float(i))
+        repository.add(ingredient)
+        ids.append(ingredient.id)
+
+    for concurrency in (1, 10, 100, 1000):
+        requests = [ids[i % len(ids)] for i in range(concurrency)]
+
+        service = Service(LatencyRepository(repository))
+        start = time.perf_counter()
+        for id in requests:
+            service(id)
+        sync_time = time.perf_counter() - start
+
+        async_service = AsyncService(AsyncLatencyRepository(repository))
+
+        async def run():
+            await asyncio.gather(*(async_service(id) for id in requests))
+
+        start = time.perf_counter()
+        asyncio.run(run())
+        async_time = time.perf_counter() - start
+        print(f"{concurrency:>5} peticiones: sync {concurrency / sync_time:8.0f} req/s, "
+              f"async {concurrency / async_time:8.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
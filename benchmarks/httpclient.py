@@ -0,0 +1,60 @@
+"""
+llamadas secuenciales con requests.post (como ejercicios/clienthttp.py)
+contra HttpClient con pool y map concurrente, sobre un servidor local
+que simula la API de ingredientes
+ejecutar: python -m benchmarks.httpclient
+"""
+import json
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+import requests
+from app.infraestructure.client.httpclient import HttpClient
+
+LATENCY = 0.002
+CALLS = 500
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(LATENCY)
+        payload = json.dumps({"id": str(uuid.uuid4()), **body}).encode()
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    bodies = [{"name": f"ingrediente {i}", "cost": 1.0} for i in range(CALLS)]
+
+    start = time.perf_counter()
+    for body in bodies:
+        requests.post(f"{base_url}/ingredients", json=body)
+    sequential = time.perf_counter() - start
+
+    with HttpClient(base_url, pool_size=16) as client:
+        start = time.perf_counter()
+        responses = client.map([("POST", "/ingredients", {"json": body}) for body in bodies])
+        pooled = time.perf_counter() - start
+        assert all(not isinstance(response, Exception) and response.status_code == 201
+                   for response in responses)
+        print(f"secuencial: {CALLS / sequential:8.0f} llamadas/s")
+        print(f"pool + map: {CALLS / pooled:8.0f} llamadas/s")
+        print(client.stats())
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+prueba de carga HTTP de extremo a extremo contra la app de main.py
+
+arranca la app en un servidor WSGI local en otro proceso (asi no
+comparte el GIL con los clientes) y sin el log por peticion de werkzeug,
+precarga el catalogo con cada tamaño y lanza clientes concurrentes contra:
+    POST /ingredients
+    GET  /ingredients/<id>
+    GET  /ingredients?limit=20&cursor=...   (cada cliente pagina con el cursor)
+    GET  /ingredients/search?q=...
+
+cada escenario se repite --runs veces y se informa de la mediana de las
+peticiones por segundo y de las latencias p50/p95/p99; con --save-baseline
+guarda el resultado en json y en las siguientes ejecuciones falla (exit 1)
+si algun escenario empeora mas del umbral. Tambien falla si alguna
+peticion devuelve error, haya baseline o no
+
+create va el ultimo y al terminar se borra lo creado, asi el catalogo
+de cada escenario tiene el tamaño de su etiqueta
+
+ejecutar: python -m benchmarks.load --sizes 1000,100000 --seconds 5
+"""
+import argparse
+import base64
+import http.client
+import json
+import logging
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+BASELINE = Path(__file__).parent / "baselines" / "load.json"
+# nombre de los que crea el escenario create, para borrarlos despues
+CREATED = "carga create"
+
+
+def ingredient_id(i):
+    # ids deterministas: el proceso de los clientes los conoce sin pedirlos
+    return uuid.UUID(int=i + 1)
+
+
+def encode_cursor(id):
+    # como el cursor de GET /ingredients: el uuid en base64 url sin relleno
+    return base64.urlsafe_b64encode(id.bytes).decode().rstrip("=")
+
+
+def serve():
+    """proceso servidor: escribe el puerto y atiende ordenes por stdin"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app.core.predicates import Eq
+    from app.dominio.ingredient.ingredient import Ingredient
+    from app.infraestructure.ingredients.ingredientsrepository import ingredient_repository
+    from main import app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    # HTTP/1.1 para que los clientes reutilicen la conexion
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(server.server_port, flush=True)
+
+    for line in sys.stdin:
+        command, *args = line.split()
+        if command == "preload":
+            start, stop = map(int, args)
+            ingredient_repository.add_many(
+                Ingredient.create(ingredient_id(i), f"ingrediente {i}", round(random.uniform(0, 10), 2))
+                for i in range(start, stop)
+            )
+        elif command == "clean":
+            while created := ingredient_repository.query(Eq("name", CREATED), 0, 10_000):
+                for ingredient in created:
+                    ingredient_repository.remove(ingredient)
+        print("ok", flush=True)
+    server.shutdown()
+
+
+class Server:
+    def __init__(self):
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.load", "--serve"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        self.port = int(self._process.stdout.readline())
+
+    def send(self, *command):
+        self._process.stdin.write(" ".join(map(str, command)) + "\n")
+        self._process.stdin.flush()
+        if self._process.stdout.readline().strip() != "ok":
+            raise RuntimeError(f"el servidor no respondio a {command}")
+
+    def close(self):
+        self._process.stdin.close()
+        self._process.wait()
+
+
+def scenarios(size):
+    """escenario -> fabrica de un generador de peticiones por cliente; el
+    generador recibe el cuerpo de la respuesta anterior"""
+    body = json.dumps({"name": CREATED, "cost": 2.5})
+
+    def get():
+        while True:
+            yield "GET", f"/ingredients/{ingredient_id(random.randrange(size))}", None
+
+    def pages():
+        # cada cliente recorre el catalogo desde un punto al azar; al
+        # llegar al final vuelve a empezar
+        path = f"/ingredients?limit=20&cursor={encode_cursor(ingredient_id(random.randrange(size)))}"
+        while True:
+            previous = yield "GET", path, None
+            # sin "next" (ultima pagina o un error, que no es json) se
+            # vuelve a empezar
+            next = json.loads(previous).get("next") if previous.startswith(b"{") else None
+            path = f"/ingredients?limit=20&cursor={next}" if next else "/ingredients?limit=20"
+
+    def search():
+        while True:
+            number = random.randrange(size)
+            q = random.choice(["ingr", f"ingrediente {number}", f"{number}"[:3], "ingrdiente"])
+            yield "GET", f"/ingredients/search?q={q.replace(' ', '+')}", None
+
+    def create():
+        while True:
+            yield "POST", "/ingredients", body
+
+    return {"get": get, "list": pages, "search": search, "create": create}
+
+
+def drive(port, scenario, seconds, clients):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        nonlocal errors
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        requests = scenario()
+        method, path, body = next(requests)
+        mine, failed = [], 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            connection.request(method, path, body, {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            data = response.read()
+            mine.append(time.perf_counter() - start)
+            failed += response.status >= 400
+            method, path, body = requests.send(data)
+        connection.close()
+        with lock:
+            latencies.extend(mine)
+            errors += failed
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": quantiles[49] * 1e3,
+        "p95": quantiles[94] * 1e3,
+        "p99": quantiles[98] * 1e3,
+        "errors": errors,
+    }
+
+
+def median(runs):
+    # las repeticiones de un escenario: mediana de cada medida, errores sumados
+    result = {key: statistics.median(run[key] for run in runs) for key in ("rps", "p50", "p95", "p99")}
+    result["errors"] = sum(run["errors"] for run in runs)
+    return result
+
+
+def failures(results):
+    return [f"{key}: {result['errors']} peticiones con error"
+            for key, result in results.items() if result["errors"]]
+
+
+def regressions(results, baseline, threshold):
+    found = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        if result["rps"] < reference["rps"] * (1 - threshold):
+            found.append(f"{key}: rps {result['rps']:.0f} < {reference['rps']:.0f}")
+        if result["p99"] > reference["p99"] * (1 + threshold):
+            found.append(f"{key}: p99 {result['p99']:.2f} ms > {reference['p99']:.2f} ms")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--runs", type=int, default=3, help="repeticiones de cada escenario")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="empeoramiento permitido respecto a la baseline (0.2 = 20%%)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        return serve()
+
+    server = Server()
+    results = {}
+    loaded = 0
+    try:
+        for size in map(int, args.sizes.split(",")):
+            # el catalogo crece de un tamaño al siguiente
+            server.send("preload", loaded, size)
+            loaded = size
+            for name, scenario in scenarios(size).items():
+                runs = [drive(server.port, scenario, args.seconds, args.clients) for _ in range(args.runs)]
+                result = results[f"{name}@{size}"] = median(runs)
+                print(f"{name:<7} {size:>8}: {result['rps']:8.0f} req/s  p50 {result['p50']:6.2f} ms  "
+                      f"p95 {result['p95']:6.2f} ms  p99 {result['p99']:6.2f} ms  errores {result['errors']}")
+            server.send("clean")
+    finally:
+        server.close()
+
+    # una ejecucion con errores no vale ni como medida ni como baseline
+    found = failures(results)
+    for failure in found:
+        print(f"ERROR {failure}", file=sys.stderr)
+    if found:
+        return 1
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2))
+        return 0
+    if args.baseline.exists():
+        found = regressions(results, json.loads(args.baseline.read_text()), args.threshold)
+        for regression in found:
+            print(f"REGRESION {regression}", file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
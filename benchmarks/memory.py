@@ -0,0 +1,25 @@
+"""
+bytes por entidad en memoria
+ejecutar: python -m benchmarks.memory
+"""
+import tracemalloc
+import uuid
+from app.dominio.ingredient.ingredient import Ingredient
+
+
+def main():
+    for size in (100_000, 1_000_000):
+        ids = [uuid.uuid4() for _ in range(size)]
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        ingredients = [Ingredient.create(id, "ingrediente", 1.5) for id in ids]
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        # descontamos la lista que los contiene
+        per_entity = (after - before - ingredients.__sizeof__()) / size
+        print(f"{size:>9} ingredientes: {per_entity:6.1f} bytes por entidad")
+        del ingredients
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+microbenchmarks de las primitivas del dominio y del repositorio
+
+cada caso se calienta, se mide en --repeat repeticiones con timeit
+(autorange elige cuantas llamadas por repeticion), se descartan los
+valores fuera de 1.5 * IQR y se informa la mediana
+
+    python benchmarks/micro.py                       # arbol actual
+    python benchmarks/micro.py --json actual.json
+    python benchmarks/micro.py --rev HEAD~5 --json antes.json
+    python benchmarks/micro.py --compare antes.json actual.json
+
+--rev crea un git worktree temporal de esa revision y mide su codigo con
+este mismo script; los casos que no existen en esa revision se saltan
+"""
+import argparse
+import json
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SIZES = (1_000, 10_000, 100_000)
+
+
+def cases():
+    from app.dominio.ingredient.ingredient import Ingredient
+    from app.dominio.pizza.pizza import Pizza
+    from app.infraestructure.ingredients.ingredientsrepository import IngredientRepository
+
+    a = Ingredient(uuid.uuid4(), "queso", 2.0)
+    b = Ingredient(a.id, "queso", 2.0)
+    yield "EntityBase.__hash__", lambda: hash(a)
+    yield "EntityBase.__eq__", lambda: a == b
+    yield "Ingredient.create", lambda: Ingredient.create(a.id, "queso", 2.0)
+
+    toppings = {(f"ingrediente {i}", float(i)) for i in range(10)}
+    pizza = Pizza.create(uuid.uuid4(), "pizza", "", "", toppings)
+    yield "Pizza.__init__", lambda: Pizza(pizza.id, "pizza", "", "", toppings)
+    yield "Pizza.price", lambda: pizza.price
+
+    for size in SIZES:
+        repository = IngredientRepository(set())
+        ingredients = [
+            Ingredient.create(uuid.uuid4(), f"ingrediente {i}", round(random.uniform(0, 10), 2))
+            for i in range(size)
+        ]
+        for ingredient in ingredients:
+            repository.add(ingredient)
+        target = ingredients[size // 2]
+        yield f"Get.find@{size}", lambda r=repository, t=target: r.find(t.id)
+        yield f"Update.update@{size}", lambda r=repository, t=target: r.update(t)
+        yield (f"IngredientRepository.query(lambda)@{size}",
+               lambda r=repository: r.query(lambda i: 2.0 <= i.cost <= 2.1, 0, 10))
+        try:
+            from app.core.predicates import Range
+        except ImportError:
+            continue
+        yield (f"IngredientRepository.query(Range)@{size}",
+               lambda r=repository: r.query(Range("cost", 2.0, 2.1), 0, 10))
+
+
+def reject_outliers(values):
+    if len(values) < 4:
+        return values
+    q1, _, q3 = statistics.quantiles(values, n=4)
+    fence = 1.5 * (q3 - q1)
+    return [v for v in values if q1 - fence <= v <= q3 + fence]
+
+
+def measure(function, repeat, warmup):
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    timer.repeat(warmup, number)
+    samples = [t / number for t in timer.repeat(repeat, number)]
+    kept = reject_outliers(samples)
+    return {
+        "median_ns": statistics.median(kept) * 1e9,
+        "stdev_ns": (statistics.stdev(kept) if len(kept) > 1 else 0.0) * 1e9,
+        "kept": len(kept),
+        "runs": len(samples),
+    }
+
+
+def selected(name, pattern):
+    # como palabra entera: "@1000" no incluye "@10000" ni "find" "finder";
+    # en un extremo que no es letra o cifra ("@", ")") no se mira el borde
+    left = r"(?<!\w)" if re.match(r"\w", pattern) else ""
+    right = r"(?!\w)" if re.search(r"\w$", pattern) else ""
+    return re.search(left + re.escape(pattern) + right, name) is not None
+
+
+def run(repeat, warmup, pattern):
+    results = {}
+    for name, function in cases():
+        if pattern and not selected(name, pattern):
+            continue
+        try:
+            results[name] = measure(function, repeat, warmup)
+        except (AttributeError, TypeError) as e:
+            # la revision medida no tiene esta API
+            print(f"{name:<45} saltado: {e}", file=sys.stderr)
+            continue
+        result = results[name]
+        print(f"{name:<45} {result['median_ns']:12.1f} ns  ±{result['stdev_ns']:9.1f}  "
+              f"({result['kept']}/{result['runs']})")
+    return results
+
+
+def run_revision(rev, args):
+    # el worktree tiene el codigo de esa revision, pero medimos con este script
+    with tempfile.TemporaryDirectory() as tmp:
+        worktree = Path(tmp, "tree")
+        subprocess.run(["git", "-C", str(ROOT), "worktree", "add", "--detach", str(worktree), rev],
+                       check=True, capture_output=True)
+        try:
+            command = [sys.executable, str(Path(__file__).resolve()), "--root", str(worktree),
+                       "--repeat", str(args.repeat), "--warmup", str(args.warmup)]
+            if args.json:
+                command += ["--json", str(Path(args.json).resolve())]
+            if args.filter:
+                command += ["--filter", args.filter]
+            return subprocess.run(command, cwd=worktree).returncode
+        finally:
+            subprocess.run(["git", "-C", str(ROOT), "worktree", "remove", "--force", str(worktree)],
+                           check=True)
+
+
+def compare(before_path, after_path):
+    before = json.loads(Path(before_path).read_text())
+    after = json.loads(Path(after_path).read_text())
+    for name in after:
+        if name not in before:
+            continue
+        old, new = before[name]["median_ns"], after[name]["median_ns"]
+        print(f"{name:<45} {old:12.1f} -> {new:12.1f} ns  x{old / new:7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--filter", help="solo los casos que contienen este texto como palabra entera")
+    parser.add_argument("--json", help="guarda los resultados en este fichero")
+    parser.add_argument("--rev", help="mide otra revision de git")
+    parser.add_argument("--root", type=Path, default=ROOT, help=argparse.SUPPRESS)
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DESPUES"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+    if args.rev:
+        return run_revision(args.rev, args)
+    sys.path.insert(0, str(args.root))
+    random.seed(0)
+    results = run(args.repeat, args.warmup, args.filter)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+"""
+coste de construir una pizza, leer sus ingredientes y su precio
+ejecutar: python -m benchmarks.pizza
+"""
+import timeit
+import uuid
+from app.dominio.pizza.pizza import Pizza
+
+
+def main():
+    for size in (5, 20, 100):
+        ingredients = {(f"ingrediente {i}", float(i)) for i in range(size)}
+        pizza = Pizza.create(uuid.uuid4(), "pizza", "", "", ingredients)
+        number = 20_000
+        cases = {
+            "__init__": lambda: Pizza(uuid.uuid4(), "pizza", "", "", ingredients),
+            "ingredient": lambda: pizza.ingredient,
+            "price": lambda: pizza.price,
+            "add+remove": lambda: (pizza.add_ingredient(("extra", 1.0)),
+                                   pizza.remove_ingredient(("extra", 1.0))),
+        }
+        for name, case in cases.items():
+            elapsed = timeit.timeit(case, number=number)
+            print(f"{size:>4} ingredientes {name:<11}: {elapsed / number * 1e6:9.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+precio de la carta: Pizza.price una a una contra PricingEngine
+ejecutar: python -m benchmarks.pricing
+"""
+import math
+import random
+import time
+import uuid
+from app.dominio.pizza.pizza import Pizza
+from app.dominio.pizza.pricing import PricingEngine
+
+
+def main():
+    catalog = [(f"ingrediente {i}", round(random.uniform(0.1, 5), 2)) for i in range(200)]
+    for size in (1_000, 10_000):
+        menu = [
+            Pizza.create(uuid.uuid4(), f"pizza {i}", "", "", random.sample(catalog, 8))
+            for i in range(size)
+        ]
+        start = time.perf_counter()
+        scalar = {pizza.id: pizza.price for pizza in menu}
+        scalar_time = time.perf_counter() - start
+
+        engine = PricingEngine(menu)
+        start = time.perf_counter()
+        vector = engine.as_dict()
+        vector_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        engine.prices(profit=1.5, costs={catalog[0][0]: 9.0})
+        whatif_time = time.perf_counter() - start
+
+        assert all(math.isclose(scalar[id], vector[id]) for id in scalar)
+        print(f"{size:>6} pizzas: escalar {scalar_time * 1e3:7.2f} ms, "
+              f"numpy {vector_time * 1e3:7.2f} ms, what-if {whatif_time * 1e3:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
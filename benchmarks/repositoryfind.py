@@ -0,0 +1,30 @@
+"""
+latencia de Get.find con el indice por id
+ejecutar: python -m benchmarks.repositoryfind
+"""
+import timeit
+import uuid
+from app.core.repository import Add, Get
+from app.dominio.ingredient.ingredient import Ingredient
+
+
+class Repository(Add, Get):
+    pass
+
+
+def main():
+    for size in (1_000, 10_000, 100_000, 1_000_000):
+        repository = Repository(set())
+        ids = []
+        for i in range(size):
+            ingredient = Ingredient.create(uuid.uuid4(), f"ingrediente {i}", 1.0)
+            repository.add(ingredient)
+            ids.append(ingredient.id)
+        id = ids[size // 2]
+        number = 100_000
+        elapsed = timeit.timeit(lambda: repository.find(id), number=number)
+        print(f"{size:>9} ingredientes: {elapsed / number * 1e9:8.1f} ns por find")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+operaciones por segundo: repositorio en memoria contra sqlite
+ejecutar: python -m benchmarks.repositorythroughput
+"""
+import os
+import random
+import tempfile
+import time
+import uuid
+from app.core.predicates import Range
+from app.dominio.ingredient.ingredient import Ingredient
+from app.infraestructure.ingredients.ingredientsrepository import IngredientRepository
+from app.infraestructure.ingredients.sqliteingredientsrepository import SqliteIngredientRepository
+
+
+def measure(name, operation, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        operation()
+    elapsed = time.perf_counter() - start
+    print(f"    {name:<10} {number / elapsed:12.0f} ops/s")
+
+
+def run(repository, ingredients):
+    start = time.perf_counter()
+    repository.add_many(ingredients)
+    print(f"    {'add_many':<10} {len(ingredients) / (time.perf_counter() - start):12.0f} filas/s")
+    ids = [i.id for i in random.sample(ingredients, 1000)]
+    measure("find", lambda: repository.find(random.choice(ids)), 10_000)
+    measure("query", lambda: repository.query(Range("cost", 2.0, 2.1), 0, 10), 2_000)
+    entity = ingredients[0]
+    measure("update", lambda: repository.update(entity), 2_000)
+
+
+def main():
+    size = 100_000
+    ingredients = [
+        Ingredient.create(uuid.uuid4(), f"ingrediente {i}", round(random.uniform(0, 10), 2))
+        for i in range(size)
+    ]
+    print(f"memoria ({size} ingredientes)")
+    run(IngredientRepository(set()), ingredients)
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"sqlite ({size} ingredientes)")
+        repository = SqliteIngredientRepository(os.path.join(directory, "ingredients.db"))
+        run(repository, ingredients)
+        repository.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+latencia de SearchIndex.search (autocompletar) segun el tamano del catalogo
+ejecutar: python -m benchmarks.search
+"""
+import random
+import timeit
+import uuid
+from app.core.searchindex import SearchIndex
+from app.dominio.ingredient.ingredient import Ingredient
+
+BASES = ["jamón", "queso", "tomate", "champiñón", "piña", "pimiento", "cebolla", "atún",
+         "anchoa", "aceituna", "albahaca", "orégano", "salami", "pepperoni", "bacon", "pollo"]
+ADJECTIVES = ["serrano", "york", "azul", "manchego", "cherry", "rojo", "verde", "negra",
+              "fresca", "ahumado", "picante", "dulce"]
+# "york serrano": palabras comunes que nunca van juntas, el peor caso
+QUERIES = ["jam", "serr", "champinon", "jamon sarrano", "queso man 12", "york serrano", "xyz"]
+
+
+def main():
+    random.seed(1)
+    for size in (1_000, 100_000, 1_000_000):
+        index = SearchIndex("name")
+        index.add_many(
+            Ingredient(uuid.uuid4(), f"{random.choice(BASES)} {random.choice(ADJECTIVES)} {i}", 1.0)
+            for i in range(size)
+        )
+        for query in QUERIES:
+            number = 200
+            elapsed = timeit.timeit(lambda: index.search(query, 10), number=number)
+            print(f"{size:>9} ingredientes {query!r:>16}: {elapsed / number * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+respuesta de GET /ingredients/<id>: validar + dict + jsonify contra
+model_construct + model_dump_json
+
+la peticion completa se compara con la vista de la baseline (Response
+validada y devuelta por flask_pydantic), montada en /baseline sobre la
+misma app y el mismo repositorio; cada ronda alterna las dos y se da la
+mediana
+ejecutar: python -m benchmarks.serialization
+"""
+import statistics
+import timeit
+import uuid
+from flask import Blueprint, jsonify
+from flask_pydantic import validate
+from app.dominio.ingredient.ingredient import Ingredient
+from app.features.ingredients.queries.get import Response
+from app.core.jsonresponse import json_response
+from app.infraestructure.ingredients.ingredientsrepository import ingredient_repository
+from main import app
+
+ROUNDS = 5
+
+baseline = Blueprint("baseline_ingredient_get", __name__)
+
+
+@baseline.route("/baseline/ingredients/<uuid:id>")
+@validate()
+def baseline_controller(id: uuid.UUID):
+    # la vista de GET /ingredients/<id> antes de json_response
+    ingredient = ingredient_repository.find(id)
+    return Response(id=ingredient.id, name=ingredient.name, cost=ingredient.cost)
+
+
+def main():
+    ingredient = Ingredient.create(uuid.uuid4(), "queso", 2.5)
+
+    def before():
+        response = Response(id=ingredient.id, name=ingredient.name, cost=ingredient.cost)
+        return jsonify(response.model_dump(mode="json"))
+
+    def after():
+        response = Response.trusted(id=ingredient.id, name=ingredient.name, cost=ingredient.cost)
+        return json_response(response)
+
+    number = 50_000
+    with app.app_context():
+        for name, case in (("antes", before), ("despues", after)):
+            elapsed = timeit.timeit(case, number=number)
+            print(f"respuesta {name:<8}: {elapsed / number * 1e6:7.2f} us")
+
+    # peticion completa con el cliente de pruebas de flask
+    app.register_blueprint(baseline)
+    ingredient_repository.add(ingredient)
+    client = app.test_client()
+    paths = {"baseline": f"/baseline/ingredients/{ingredient.id}", "actual": f"/ingredients/{ingredient.id}"}
+    for path in paths.values():
+        assert client.get(path).json == {"id": str(ingredient.id), "name": "queso", "cost": 2.5}
+    number = 2_000
+    rounds = {name: [] for name in paths}
+    for _ in range(ROUNDS):
+        for name, path in paths.items():
+            rounds[name].append(timeit.timeit(lambda: client.get(path), number=number) / number)
+    medians = {name: statistics.median(times) for name, times in rounds.items()}
+    for name, median in medians.items():
+        print(f"GET /ingredients/<id> {name:<8}: {median * 1e6:7.1f} us  {1 / median:8.0f} req/s")
+    print(f"actual / baseline: {medians['actual'] / medians['baseline']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
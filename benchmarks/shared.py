@@ -0,0 +1,66 @@
+"""
+lecturas por segundo del catalogo en memoria compartida segun el numero
+de procesos que leen a la vez, con un escritor actualizando de fondo
+ejecutar: python -m benchmarks.shared
+"""
+import multiprocessing
+import os
+import random
+import time
+import uuid
+from app.dominio.ingredient.ingredient import Ingredient
+from app.infraestructure.ingredients.sharedingredientsrepository import SharedIngredientRepository
+
+SECONDS = 2
+
+
+def reader(name, ids, results):
+    repository = SharedIngredientRepository(name)
+    operations = 0
+    deadline = time.perf_counter() + SECONDS
+    while time.perf_counter() < deadline:
+        repository.find(random.choice(ids))
+        operations += 1
+    results.put(operations)
+    repository.close()
+
+
+def writer(name, ids, stop):
+    repository = SharedIngredientRepository(name)
+    while not stop.is_set():
+        ingredient = repository.find(random.choice(ids))
+        ingredient.update(ingredient.name, ingredient.cost + 1)
+        repository.update(ingredient)
+        time.sleep(0.001)
+    repository.close()
+
+
+def main():
+    name = f"bench-{uuid.uuid4().hex[:8]}"
+    repository = SharedIngredientRepository(name, capacity=200_000)
+    ingredients = [Ingredient.create(uuid.uuid4(), f"ingrediente {i}", float(i)) for i in range(100_000)]
+    repository.add_many(ingredients)
+    ids = [ingredient.id for ingredient in ingredients]
+    try:
+        for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+            results = multiprocessing.Queue()
+            stop = multiprocessing.Event()
+            background = multiprocessing.Process(target=writer, args=(name, ids, stop))
+            background.start()
+            processes = [multiprocessing.Process(target=reader, args=(name, ids, results))
+                         for _ in range(workers)]
+            for process in processes:
+                process.start()
+            total = sum(results.get() for _ in processes)
+            for process in processes:
+                process.join()
+            stop.set()
+            background.join()
+            print(f"{workers:>3} procesos: {total / SECONDS:10.0f} find/s")
+    finally:
+        repository.close()
+        repository.unlink()
+
+
+if __name__ == "__main__":
+    main()
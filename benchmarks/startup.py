@@ -0,0 +1,74 @@
+"""
+tiempo de arranque con cientos de slices: importando todo contra el
+manifiesto de rutas con vistas perezosas
+ejecutar: python -m benchmarks.startup
+"""
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SLICE = '''
+import uuid
+from app.core.custombasemodel import CustomBaseModel
+from flask import Blueprint
+
+bp = Blueprint("bench_{i}", __name__)
+
+
+class Response(CustomBaseModel):
+    id: uuid.UUID
+    name: str
+    cost: float
+
+
+@bp.route("/bench/{i}")
+def controller():
+    return Response.trusted(id=uuid.uuid4(), name="{i}", cost=1.0).model_dump(mode="json")
+'''
+
+ARRANQUE = '''
+import sys
+sys.path[:0] = [{root!r}, {tmp!r}]
+from flask import Flask
+from main import registrar_rutas, cargar_modulos_y_blueprints
+app = Flask("bench")
+if {eager}:
+    for bp in cargar_modulos_y_blueprints({base!r}, "slices"):
+        app.register_blueprint(bp)
+else:
+    registrar_rutas(app, {base!r}, {manifest!r}, "slices")
+'''
+
+
+def arrancar(tmp, eager):
+    codigo = ARRANQUE.format(
+        root=str(Path.cwd()), tmp=tmp, base=f"{tmp}/slices",
+        manifest=f"{tmp}/routes.json", eager=eager,
+    )
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", codigo], check=True, cwd=tmp)
+    return time.perf_counter() - start
+
+
+def main():
+    for size in (100, 500):
+        with tempfile.TemporaryDirectory() as tmp:
+            package = Path(tmp, "slices")
+            for group in range(size // 10):
+                directory = package / f"group{group}"
+                directory.mkdir(parents=True)
+                (directory / "__init__.py").touch()
+                for i in range(group * 10, group * 10 + 10):
+                    (directory / f"slice{i}.py").write_text(SLICE.format(i=i))
+            (package / "__init__.py").touch()
+            eager = arrancar(tmp, True)
+            cold = arrancar(tmp, False)
+            warm = arrancar(tmp, False)
+            print(f"{size:>4} slices: importando todo {eager:6.2f} s, "
+                  f"manifiesto nuevo {cold:6.2f} s, manifiesto guardado {warm:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+estres de lecturas y escrituras a la vez sobre el repositorio con lock
+
+varios hilos leen (find, query por rango, una pagina de scan) mientras
+otros escriben (add, update, remove), cada escritor sobre sus propios
+ingredientes para saber como tiene que quedar cada uno. Se mide el
+throughput y se comprueba:
+
+    - ningun hilo ve una excepcion (p.ej. "set changed size during iteration")
+    - find nunca falla para un ingrediente que nadie borra
+    - query solo devuelve lo que cumple el predicado
+    - al terminar no se ha perdido ningun update y los indices cuadran
+      con el contenido
+
+ejecutar: python -m benchmarks.stress
+"""
+import random
+import sys
+import threading
+import time
+import uuid
+from itertools import islice
+from app.core.predicates import Range
+from app.dominio.ingredient.ingredient import Ingredient
+from app.infraestructure.ingredients.ingredientsrepository import ConcurrentIngredientRepository
+
+SECONDS = 2
+SIZE = 10_000
+WRITERS = 2
+
+
+def reader(repository, stable, stop, counts, errors):
+    operations = 0
+    while not stop.is_set():
+        try:
+            choice = random.random()
+            if choice < 0.6:
+                repository.find(random.choice(stable))
+            elif choice < 0.9:
+                low = random.uniform(0, 9)
+                for ingredient in repository.query(Range("cost", low, low + 0.5), 0, 20):
+                    if not low <= ingredient.cost <= low + 0.5:
+                        errors.append(f"query fuera de rango: {ingredient.cost}")
+            else:
+                list(islice(repository.scan(random.choice(stable)), 20))
+        except Exception as e:
+            errors.append(repr(e))
+        operations += 1
+    counts.append(operations)
+
+
+def writer(repository, own, expected, stop, counts, errors):
+    # own: ingredientes de este escritor; expected: id -> coste que deben tener
+    operations = 0
+    while not stop.is_set():
+        try:
+            choice = random.random()
+            if choice < 0.6 and own:
+                ingredient = random.choice(own)
+                cost = round(random.uniform(0, 10), 2)
+                repository.update(Ingredient(ingredient.id, ingredient.name, cost))
+                expected[ingredient.id] = cost
+            elif choice < 0.8 or not own:
+                ingredient = Ingredient.create(uuid.uuid4(), f"nuevo {operations}", random.uniform(0, 10))
+                repository.add(ingredient)
+                own.append(ingredient)
+                expected[ingredient.id] = ingredient.cost
+            else:
+                ingredient = own.pop(random.randrange(len(own)))
+                repository.remove(ingredient)
+                del expected[ingredient.id]
+        except Exception as e:
+            errors.append(repr(e))
+        operations += 1
+    counts.append(operations)
+
+
+def check(repository, expected, errors):
+    index = repository.index
+    if set(index) != set(expected):
+        errors.append(f"ids: {len(index)} en el repositorio, {len(expected)} esperados")
+    lost = sum(1 for id, cost in expected.items() if id in index and index[id].cost != cost)
+    if lost:
+        errors.append(f"{lost} updates perdidos")
+    ranged = repository.query(Range("cost", None, None), 0, len(expected) + 1)
+    if len(ranged) != len(expected) or len(repository.data) != len(expected):
+        errors.append(f"indice de coste con {len(ranged)} y set con {len(repository.data)} "
+                      f"para {len(expected)} ingredientes")
+    if len(list(repository.scan())) != len(expected):
+        errors.append("scan no recorre todo el catalogo")
+
+
+def run(readers):
+    stable = [Ingredient.create(uuid.uuid4(), f"ingrediente {i}", random.uniform(0, 10))
+              for i in range(SIZE)]
+    repository = ConcurrentIngredientRepository(set(stable))
+    expected = {ingredient.id: ingredient.cost for ingredient in stable}
+    stable_ids = [ingredient.id for ingredient in stable]
+    stop = threading.Event()
+    reads, writes, errors = [], [], []
+    written = [{} for _ in range(WRITERS)]
+    threads = [threading.Thread(target=reader, args=(repository, stable_ids, stop, reads, errors))
+               for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(repository, [], own, stop, writes, errors))
+                for own in written]
+    for thread in threads:
+        thread.start()
+    time.sleep(SECONDS)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    for own in written:
+        expected.update(own)
+    check(repository, expected, errors)
+    print(f"{readers:>3} lectores {WRITERS} escritores: {sum(reads) / SECONDS:10.0f} lecturas/s "
+          f"{sum(writes) / SECONDS:8.0f} escrituras/s  errores: {len(errors)}")
+    for error in errors[:5]:
+        print(f"    {error}")
+    return not errors
+
+
+def main():
+    ok = all([run(readers) for readers in (1, 2, 4, 8)])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,41 @@
 import sys
-import importlib.util
+import os
+import json
+import contextlib
+import importlib
+import inspect
 from pathlib import Path
-from flask import Flask
+from flask import Flask, current_app
 from app.core.errors import error_handlers
+from app.core.requestmetrics import metrics
+from app.core.profiler import profiling
 
 sys.path.insert(0, str(Path('.').resolve()))
 
-def cargar_modulos_y_blueprints(base_path: str, extension='.py'):
+# rutas de app/features guardadas la primera vez que se arranca, para no
+# recorrer el disco ni importar todos los modulos en cada arranque
+# FEATURES_MANIFEST cambia donde se guarda (p.ej. un directorio escribible)
+MANIFIESTO = Path(os.environ.get('FEATURES_MANIFEST', '.routes.json'))
+# subir al cambiar las claves que se guardan de cada ruta: un manifiesto de
+# otra version se regenera aunque ningun modulo haya cambiado
+VERSION = 2
+
+
+def modulos(base_path: str, paquete=None, extension='.py'):
     base_path = Path(base_path)
-    blueprints = []
-    files = base_path.rglob(f'*{extension}')
-    for py_file in files:
+    paquete = paquete or '.'.join(base_path.parts)
+    for py_file in sorted(base_path.rglob(f'*{extension}')):
         if py_file.name == '__init__.py':
             continue
-
         modulo_relativo = py_file.relative_to(base_path).with_suffix('')
-        modulo_nombre = '.'.join(modulo_relativo.parts)
-        ruta_modulo = py_file.resolve()
+        yield '.'.join((paquete, *modulo_relativo.parts)), py_file
+
 
-        spec = importlib.util.spec_from_file_location(modulo_nombre, ruta_modulo)
-        modulo = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(modulo)
+def cargar_modulos_y_blueprints(base_path: str, paquete=None):
+    blueprints = []
+    for modulo_nombre, _ in modulos(base_path, paquete):
+        # con su nombre real: si otro modulo ya lo importo no se ejecuta otra vez
+        modulo = importlib.import_module(modulo_nombre)
 
         # Si el módulo tiene un blueprint llamado `bp`, lo recogemos
         if hasattr(modulo, 'bp'):
@@ -28,13 +43,114 @@ def cargar_modulos_y_blueprints(base_path: str, extension='.py'):
 
     return blueprints
 
+
+def fuentes(base_path: str, ficheros):
+    # mtime de los directorios (cambia al crear o borrar un modulo) y de los
+    # ficheros (cambia al editarlos): basta un stat por entrada, sin rglob
+    rutas = {Path(base_path), *ficheros}
+    rutas.update(directorio for fichero in ficheros for directorio in fichero.parents
+                 if Path(base_path) in directorio.parents)
+    return {str(ruta): ruta.stat().st_mtime_ns for ruta in sorted(rutas)}
+
+
+def generar_manifiesto(base_path: str, destino=MANIFIESTO, paquete=None):
+    temporal = Flask(__name__)
+    for bp in cargar_modulos_y_blueprints(base_path, paquete):
+        temporal.register_blueprint(bp)
+    rutas = []
+    for rule in temporal.url_map.iter_rules():
+        if rule.endpoint == 'static':
+            continue
+        vista = temporal.view_functions[rule.endpoint]
+        modulo = sys.modules[vista.__module__]
+        if getattr(modulo, vista.__name__, None) is not vista:
+            raise ValueError(f'{rule.endpoint}: la vista debe ser {vista.__module__}.{vista.__name__}')
+        rutas.append({
+            'rule': rule.rule,
+            'endpoint': rule.endpoint,
+            'methods': sorted(rule.methods - {'HEAD', 'OPTIONS'}),
+            'module': vista.__module__,
+            'function': vista.__name__,
+            'async': inspect.iscoroutinefunction(vista),
+        })
+    ficheros = [fichero for _, fichero in modulos(base_path, paquete)]
+    manifiesto = {'version': VERSION, 'sources': fuentes(base_path, ficheros), 'routes': rutas}
+    guardar(manifiesto, Path(destino))
+    return manifiesto
+
+
+def guardar(manifiesto, destino: Path):
+    # a un temporal y rename: otro proceso nunca lee un json a medias. En un
+    # disco de solo lectura nos quedamos con el manifiesto en memoria
+    temporal = destino.with_name(f'{destino.name}.{os.getpid()}.tmp')
+    try:
+        temporal.write_text(json.dumps(manifiesto, indent=2))
+        os.replace(temporal, destino)
+    except OSError:
+        with contextlib.suppress(OSError):
+            temporal.unlink()
+
+
+def cargar_manifiesto(base_path: str, destino=MANIFIESTO, paquete=None):
+    destino = Path(destino)
+    if destino.exists() and not os.environ.get('FEATURES_REBUILD'):
+        try:
+            manifiesto = json.loads(destino.read_text())
+            actual = {ruta: Path(ruta).stat().st_mtime_ns for ruta in manifiesto['sources']}
+        except (OSError, ValueError, KeyError, TypeError):
+            manifiesto, actual = {}, None
+        if manifiesto.get('version') == VERSION and actual == manifiesto['sources']:
+            return manifiesto
+    return generar_manifiesto(base_path, destino, paquete)
+
+
+def vista_perezosa(modulo_nombre, funcion, asincrona=False):
+    # importa el modulo (pydantic, repositorio...) en la primera peticion
+    vista = None
+
+    def cargar():
+        nonlocal vista
+        if vista is None:
+            vista = getattr(importlib.import_module(modulo_nombre), funcion)
+        return vista
+
+    # si la vista es async la envolvemos con otra async para que flask la
+    # ejecute entera en su bucle de eventos
+    if asincrona:
+        async def view(**kwargs):
+            return await cargar()(**kwargs)
+    else:
+        def view(**kwargs):
+            return current_app.ensure_sync(cargar())(**kwargs)
+
+    view.__name__ = funcion
+    return view
+
+
+def registrar_rutas(app: Flask, base_path: str, destino=MANIFIESTO, paquete=None, perezoso=True):
+    manifiesto = cargar_manifiesto(base_path, destino, paquete)
+    if not perezoso:
+        nombres = dict.fromkeys(ruta['module'] for ruta in manifiesto['routes'])
+        for modulo_nombre in nombres:
+            app.register_blueprint(importlib.import_module(modulo_nombre).bp)
+        return
+    for ruta in manifiesto['routes']:
+        app.add_url_rule(
+            ruta['rule'],
+            endpoint=ruta['endpoint'],
+            view_func=vista_perezosa(ruta['module'], ruta['function'], ruta.get('async', False)),
+            methods=ruta['methods'],
+        )
+
+
 app = Flask(__name__)
 
-# Cargar y registrar blueprints
-blueprints = cargar_modulos_y_blueprints("app/features")
-for bp in blueprints:
-    app.register_blueprint(bp)
+# Cargar y registrar blueprints; FEATURES_LAZY=0 importa todo al arrancar
+registrar_rutas(app, "app/features", perezoso=os.environ.get('FEATURES_LAZY', '1') != '0')
 error_handlers(app)
+metrics(app)
+# PROFILING=1 publica /debug/profile, sin el no hay ningun coste
+profiling(app, enabled=os.environ.get('PROFILING') == '1')
 
 if __name__ == "__main__":
     app.run(debug=True)
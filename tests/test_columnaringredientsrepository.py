@@ -0,0 +1,111 @@
+import threading
+import uuid
+import pytest
+from app.core.predicates import Range
+from app.dominio.ingredient.ingredient import Ingredient
+
+pytest.importorskip("numpy")
+from app.infraestructure.ingredients import columnaringredientsrepository as columnar  # noqa: E402
+from app.infraestructure.ingredients.columnaringredientsrepository import (  # noqa: E402
+    ColumnarIngredientRepository,
+    ConcurrentColumnarIngredientRepository,
+)
+
+
+def test_scan_follows_id_order_across_writes():
+    ingredients = [Ingredient(uuid.uuid4(), f"ingrediente {i}", float(i % 7)) for i in range(600)]
+    repository = ColumnarIngredientRepository(ingredients[:500], capacity=8)
+    ids = sorted(ingredient.id for ingredient in ingredients[:500])
+
+    assert [e.id for e in repository.scan()] == ids
+    assert [e.id for e in repository.scan(ids[99])][:3] == ids[100:103]
+
+    # un remove mueve la ultima fila al hueco y un add deja el orden viejo
+    # sin validez: scan tiene que verlo aunque ya estuviera a medias
+    scanned = repository.scan()
+    first = [next(scanned) for _ in range(300)]
+    for ingredient in ingredients[:100]:
+        repository.remove(ingredient)
+    repository.add_many(ingredients[500:])
+    expected = sorted(i.id for i in ingredients[100:])
+    rest = [e.id for e in scanned]
+    # bloques de 16, 32, 64, 128 y 256: el ultimo ya estaba leido hasta
+    # ids[495] y el resto sigue desde ahi
+    read = 16 + 32 + 64 + 128 + 256
+    assert [e.id for e in first] + rest[:read - 300] == ids[:read]
+    assert rest[read - 300:] == [id for id in expected if id > ids[read - 1]]
+    assert [e.id for e in repository.scan()] == expected
+
+
+def test_writes_keep_the_id_order_without_sorting_again(monkeypatch):
+    ingredients = [Ingredient(uuid.uuid4(), f"ingrediente {i}", 1.0) for i in range(300)]
+    repository = ColumnarIngredientRepository(ingredients[:200])
+    list(repository.scan())
+
+    # add, add_many y remove mueven el orden ya calculado: no se vuelve a
+    # ordenar todo (los lotes nuevos si se ordenan entre ellos)
+    sorts = []
+    lexsort = columnar.np.lexsort
+    monkeypatch.setattr(columnar.np, "lexsort", lambda keys: sorts.append(len(keys[0])) or lexsort(keys))
+    for ingredient in ingredients[:50]:
+        repository.remove(ingredient)
+    repository.add(ingredients[200])
+    repository.add_many(ingredients[201:])
+
+    assert [e.id for e in repository.scan()] == sorted(i.id for i in ingredients[50:])
+    assert sorts == [1, 99]
+
+
+def test_a_failed_update_leaves_the_row_as_it_was():
+    ingredient = Ingredient(uuid.uuid4(), "tomate", 1.0)
+    repository = ColumnarIngredientRepository([ingredient])
+    live = repository._live_name_bytes
+    # un surrogate suelto no se puede codificar en utf-8
+    broken = Ingredient(ingredient.id, "tomate \ud800", 2.0)
+
+    with pytest.raises(UnicodeEncodeError):
+        repository.update(broken)
+    assert broken.version == 0
+    assert repository._live_name_bytes == live
+    stored = repository.find(ingredient.id)
+    assert (stored.name, stored.cost, stored.version) == ("tomate", 1.0, 0)
+
+
+def test_columnar_matches_the_object_repository():
+    ingredients = [Ingredient(uuid.uuid4(), f"ingrediente {i}", float(i % 7)) for i in range(50)]
+    repository = ColumnarIngredientRepository(ingredients)
+    repository.update(Ingredient(ingredients[0].id, "Tomate ñ", 9.5))
+
+    assert repository.add_many(ingredients[:10]) == 0
+    assert repository.find(ingredients[0].id).name == "Tomate ñ"
+    assert repository.find(ingredients[0].id).version == 1
+    assert {i.id for i in repository.query(Range("cost", 6, None), 0, 100)} == \
+        {i.id for i in ingredients[1:] if i.cost >= 6} | {ingredients[0].id}
+    assert [i.name for i in repository.search("toma")] == ["Tomate ñ"]
+
+
+def test_concurrent_readers_and_writers():
+    ingredients = [Ingredient(uuid.uuid4(), f"ingrediente {i}", 1.0) for i in range(2000)]
+    repository = ConcurrentColumnarIngredientRepository(ingredients[:1000])
+    errors = []
+
+    def write():
+        for ingredient in ingredients[1000:]:
+            repository.add(ingredient)
+            repository.remove(repository.find(ingredient.id))
+
+    def read():
+        try:
+            for _ in range(20):
+                ids = [e.id for e in repository.scan()]
+                assert ids == sorted(ids)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(repository) == 1000
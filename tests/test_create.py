@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip("flask_pydantic")
+from flask import Flask  # noqa: E402
+from app.features.ingredients.commands import create, createbatch, importcatalog  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    for module in (create, createbatch, importcatalog):
+        app.register_blueprint(module.bp)
+    return app.test_client()
+
+
+def test_nan_and_infinite_costs_are_rejected(client):
+    for cost in ("NaN", "Infinity"):
+        body = '{"name": "Tomate", "cost": %s}' % cost
+        assert client.post("/ingredients", data=body, content_type="application/json").status_code == 400
+
+        batch = client.post("/ingredients:batch", data=f"[{body}]", content_type="application/json")
+        assert batch.get_json()["errors"][0]["index"] == 0
+
+        imported = client.post("/ingredients/import", data=body + "\n")
+        assert imported.get_json()["failed"] == 1
+
+
+def test_a_batch_reports_whether_anything_was_created(client, monkeypatch):
+    valid, invalid = {"name": "Tomate", "cost": 1.5}, {"name": "Tomate"}
+
+    assert client.post("/ingredients:batch", json=[valid]).status_code == 201
+    assert client.post("/ingredients:batch", json=[valid, invalid]).status_code == 207
+    failed = client.post("/ingredients:batch", json=[invalid, invalid])
+    assert failed.status_code == 422
+    assert [error["index"] for error in failed.get_json()["errors"]] == [0, 1]
+    assert client.post("/ingredients:batch", json=[]).status_code == 400
+
+    monkeypatch.setattr(createbatch, "MAX_ITEMS", 2)
+    assert client.post("/ingredients:batch", json=[valid] * 3).status_code == 413
@@ -0,0 +1,183 @@
+import os
+import threading
+import uuid
+import pytest
+from app.core.predicates import Eq
+from app.dominio.ingredient.ingredient import Ingredient
+import app.infraestructure.ingredients.durableingredientsrepository as durable
+from app.infraestructure.ingredients.durableingredientsrepository import (
+    DurableIngredientRepository,
+)
+
+
+def test_truncated_wal_tail_is_dropped_and_repaired(tmp_path):
+    wal = tmp_path / "ingredients.wal"
+    repository = DurableIngredientRepository(str(tmp_path))
+    kept = Ingredient(uuid.uuid4(), "Tomate", 1.0)
+    repository.add(kept)
+    valid_size = os.path.getsize(wal)
+    lost = Ingredient(uuid.uuid4(), "Jamón serrano", 2.5)
+    repository.add(lost)
+    repository.close()
+
+    # caida a mitad del ultimo registro: falta el final del payload
+    with open(wal, "r+b") as file:
+        file.truncate(os.path.getsize(wal) - 5)
+
+    repository = DurableIngredientRepository(str(tmp_path))
+    assert repository.find(kept.id).name == "Tomate"
+    assert lost.id not in repository.index
+    # el registro a medias se ha quitado del fichero
+    assert os.path.getsize(wal) == valid_size
+
+    # y el log sigue valido para lo que venga detras
+    after = Ingredient(uuid.uuid4(), "Queso", 3.0)
+    repository.add(after)
+    repository.close()
+    repository = DurableIngredientRepository(str(tmp_path))
+    assert {kept.id, after.id} == set(repository.index)
+    repository.close()
+
+
+def test_update_and_remove_survive_a_restart(tmp_path):
+    repository = DurableIngredientRepository(str(tmp_path))
+    ingredient = Ingredient(uuid.uuid4(), "Tomate", 1.0)
+    removed = Ingredient(uuid.uuid4(), "Piña", 1.0)
+    repository.add_many([ingredient, removed])
+    repository.update(Ingredient(ingredient.id, "Tomate cherry", 1.5))
+    repository.remove(removed)
+    repository.close()
+
+    repository = DurableIngredientRepository(str(tmp_path))
+    restored = repository.find(ingredient.id)
+    assert (restored.name, restored.cost, restored.version) == ("Tomate cherry", 1.5, 1)
+    assert removed.id not in repository.index
+    repository.close()
+
+
+def test_a_failed_log_write_leaves_memory_untouched(tmp_path, monkeypatch):
+    repository = DurableIngredientRepository(str(tmp_path))
+    ingredient = Ingredient(uuid.uuid4(), "Tomate", 1.0)
+    repository.add(ingredient)
+
+    def full_disk(kind, payload):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(repository._wal, "write", full_disk)
+    with pytest.raises(OSError):
+        repository.update(Ingredient(ingredient.id, "Tomate cherry", 1.5))
+    with pytest.raises(OSError):
+        repository.add(Ingredient(uuid.uuid4(), "Queso", 2.0))
+
+    assert repository.find(ingredient.id).name == "Tomate"
+    assert len(repository.index) == 1
+    repository.close()
+
+
+def test_concurrent_writers_replay_to_the_same_state(tmp_path):
+    repository = DurableIngredientRepository(str(tmp_path))
+    ingredients = [Ingredient(uuid.uuid4(), f"ingrediente {i}", 1.0) for i in range(40)]
+    repository.add_many(ingredients)
+
+    def work(chunk):
+        for step in range(20):
+            for ingredient in chunk:
+                repository.update(Ingredient(ingredient.id, ingredient.name, float(step)))
+            repository.remove(repository.find(chunk[0].id))
+            repository.add(chunk[0])
+
+    threads = [threading.Thread(target=work, args=(ingredients[i::4],)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    state = {i.id: (i.name, i.cost, i.version) for i in repository.index.values()}
+    repository.close()
+
+    reopened = DurableIngredientRepository(str(tmp_path))
+    assert {i.id: (i.name, i.cost, i.version) for i in reopened.index.values()} == state
+    reopened.close()
+
+
+def test_updates_with_fresh_instances_log_increasing_versions(tmp_path):
+    repository = DurableIngredientRepository(str(tmp_path))
+    ingredient = Ingredient(uuid.uuid4(), "Tomate", 1.0)
+    repository.add(ingredient)
+    repository.update(Ingredient(ingredient.id, "Tomate cherry", 1.5))
+    repository.update(Ingredient(ingredient.id, "Tomate pera", 2.0))
+    assert repository.find(ingredient.id).version == 2
+    repository.close()
+
+    repository = DurableIngredientRepository(str(tmp_path))
+    assert repository.find(ingredient.id).version == 2
+    repository.close()
+
+
+def test_snapshot_keeps_the_index_order(tmp_path):
+    repository = DurableIngredientRepository(str(tmp_path))
+    # costes repetidos: los empates van por id
+    repository.add_many([Ingredient(uuid.uuid4(), f"ingrediente {i}", float(i % 5)) for i in range(200)])
+    by_cost = [i.id for i in repository.scan(field="cost")]
+    by_id = [i.id for i in repository.scan()]
+    repository.snapshot()
+    repository.close()
+
+    repository = DurableIngredientRepository(str(tmp_path))
+    assert [i.id for i in repository.scan(field="cost")] == by_cost
+    assert [i.id for i in repository.scan()] == by_id
+    assert len(repository.query(Eq("name", "ingrediente 7"))) == 1
+    repository.close()
+
+
+def test_a_failed_snapshot_keeps_the_rotated_log(tmp_path, monkeypatch):
+    repository = DurableIngredientRepository(str(tmp_path))
+    kept = Ingredient(uuid.uuid4(), "Tomate", 1.0)
+    repository.add(kept)
+
+    def full_disk(path, entities, by_cost=None):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(durable, "write_snapshot", full_disk)
+    with pytest.raises(OSError):
+        repository.snapshot()
+    # lo escrito despues va al log nuevo, y un segundo fallo lo aparta detras
+    after = Ingredient(uuid.uuid4(), "Queso", 2.0)
+    repository.add(after)
+    with pytest.raises(OSError):
+        repository.snapshot()
+    repository.update(Ingredient(kept.id, "Tomate cherry", 1.5))
+    repository.close()
+    monkeypatch.undo()
+
+    repository = DurableIngredientRepository(str(tmp_path))
+    assert repository.find(kept.id).name == "Tomate cherry"
+    assert repository.find(after.id).name == "Queso"
+    repository.snapshot()
+    assert not os.path.exists(tmp_path / "ingredients.wal.1")
+    repository.close()
+
+
+def test_automatic_snapshots_run_off_the_writer(tmp_path, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    write_snapshot = durable.write_snapshot
+
+    def slow(path, entities, by_cost=None):
+        started.set()
+        release.wait(5)
+        write_snapshot(path, entities, by_cost)
+
+    monkeypatch.setattr(durable, "write_snapshot", slow)
+    repository = DurableIngredientRepository(str(tmp_path), snapshot_every=10)
+    ingredients = [Ingredient(uuid.uuid4(), f"ingrediente {i}", 1.0) for i in range(30)]
+    for ingredient in ingredients[:10]:
+        repository.add(ingredient)
+    assert started.wait(5)
+    # el snapshot sigue a medias y los escritores no le esperan
+    for ingredient in ingredients[10:]:
+        repository.add(ingredient)
+    release.set()
+    repository.close()
+
+    repository = DurableIngredientRepository(str(tmp_path))
+    assert set(repository.index) == {i.id for i in ingredients}
+    repository.close()
@@ -0,0 +1,33 @@
+import uuid
+import pytest
+
+pytest.importorskip("flask_pydantic")
+from flask import Flask  # noqa: E402
+from app.dominio.ingredient.ingredient import Ingredient  # noqa: E402
+from app.features.ingredients.queries import get  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(get.bp)
+    return app.test_client()
+
+
+def test_etag_changes_on_every_update(client):
+    ingredient = Ingredient(uuid.uuid4(), "Tomate", 1.0)
+    get.respository.add(ingredient)
+    first = client.get(f"/ingredients/{ingredient.id}")
+    assert client.get(f"/ingredients/{ingredient.id}",
+                      headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    get.respository.update(Ingredient(ingredient.id, "Tomate cherry", 1.5))
+    second = client.get(f"/ingredients/{ingredient.id}",
+                        headers={"If-None-Match": first.headers["ETag"]})
+    get.respository.update(Ingredient(ingredient.id, "Tomate pera", 2.0))
+    third = client.get(f"/ingredients/{ingredient.id}",
+                       headers={"If-None-Match": second.headers["ETag"]})
+
+    assert second.status_code == 200 and second.get_json()["name"] == "Tomate cherry"
+    assert third.status_code == 200 and third.get_json()["name"] == "Tomate pera"
+    assert len({first.headers["ETag"], second.headers["ETag"], third.headers["ETag"]}) == 3
@@ -0,0 +1,68 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+import pytest
+
+requests = pytest.importorskip("requests")
+from app.infraestructure.client.httpclient import HttpClient  # noqa: E402
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    unavailable = 0
+
+    def do_GET(self):
+        if self.path == "/slow":
+            time.sleep(0.5)
+        if self.path == "/flaky" and StubHandler.unavailable:
+            StubHandler.unavailable -= 1
+            return self._send(503, {})
+        self._send(200, {"path": self.path})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self._send(201, body)
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_map_keeps_order_and_reports_errors_per_call(base_url):
+    calls = [("POST", "/ingredients", {"json": {"name": f"i{n}"}}) for n in range(20)]
+    calls.insert(5, ("GET", "/slow", {"timeout": 0.05}))
+    with HttpClient(base_url, pool_size=4, retries=0) as client:
+        results = client.map(calls)
+
+    assert isinstance(results[5], requests.exceptions.RequestException)
+    posted = results[:5] + results[6:]
+    assert [r.json()["name"] for r in posted] == [f"i{n}" for n in range(20)]
+    assert all(r.status_code == 201 for r in posted)
+
+
+def test_retries_idempotent_calls_on_503(base_url):
+    StubHandler.unavailable = 2
+    with HttpClient(base_url, retries=3, backoff=0) as client:
+        response = client.get("/flaky")
+        stats = client.stats()
+
+    assert response.status_code == 200
+    assert stats["GET"]["count"] == 1
+    assert stats["GET"]["errors"] == 0
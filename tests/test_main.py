@@ -0,0 +1,36 @@
+import json
+import os
+import tempfile
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("flask_pydantic")
+os.environ.setdefault("FEATURES_MANIFEST", os.path.join(tempfile.mkdtemp(), ".routes.json"))
+import main  # noqa: E402
+
+
+def test_a_manifest_from_another_version_is_regenerated(tmp_path):
+    destino = tmp_path / "routes.json"
+    manifiesto = main.cargar_manifiesto("app/features", destino)
+    # un manifiesto antiguo con las mismas fuentes pero sin la clave async
+    antiguo = {"sources": manifiesto["sources"],
+               "routes": [{k: v for k, v in ruta.items() if k != "async"}
+                          for ruta in manifiesto["routes"]]}
+    destino.write_text(json.dumps(antiguo))
+
+    regenerado = main.cargar_manifiesto("app/features", destino)
+    assert regenerado["version"] == main.VERSION
+    assert all("async" in ruta for ruta in regenerado["routes"])
+    assert json.loads(destino.read_text())["version"] == main.VERSION
+
+
+def test_an_unwritable_manifest_keeps_the_routes_in_memory(tmp_path):
+    # colgando de un fichero: la escritura falla aunque los tests corran como root
+    fichero = tmp_path / "fichero"
+    fichero.write_text("")
+    destino = fichero / "routes.json"
+    app = main.Flask(__name__)
+
+    main.registrar_rutas(app, "app/features", destino)
+
+    assert "/ingredients/search" in {rule.rule for rule in app.url_map.iter_rules()}
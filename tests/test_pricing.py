@@ -0,0 +1,24 @@
+import math
+import uuid
+import pytest
+from app.dominio.pizza.pizza import Pizza
+
+pytest.importorskip("numpy")
+from app.dominio.pizza.pricing import PricingEngine  # noqa: E402
+
+
+def test_prices_match_pizza_price():
+    catalog = [(f"ingrediente {i}", 0.5 + i / 10) for i in range(20)]
+    menu = [Pizza.create(uuid.uuid4(), f"pizza {i}", "", "", catalog[i % 7:i % 7 + 5])
+            for i in range(30)]
+    engine = PricingEngine(menu)
+
+    prices = engine.as_dict()
+    assert all(math.isclose(prices[pizza.id], pizza.price) for pizza in menu)
+
+    # what-if: otro margen y un coste cambiado
+    name, cost = catalog[6]
+    changed = engine.as_dict(profit=1.5, costs={name: cost + 1})
+    for pizza in menu:
+        extra = 1 if (name, cost) in pizza.ingredient else 0
+        assert math.isclose(changed[pizza.id], (pizza.price / Pizza.PROFIT + extra) * 1.5)
@@ -0,0 +1,59 @@
+import uuid
+import pytest
+from app.core.predicates import Eq, Range
+from app.dominio.ingredient.ingredient import Ingredient
+from app.infraestructure.ingredients.ingredientsrepository import (
+    ConcurrentIngredientRepository,
+)
+
+
+def test_add_ignores_an_id_that_is_already_there():
+    repository = ConcurrentIngredientRepository(set())
+    first = Ingredient(uuid.uuid4(), "a", 1.0)
+    repository.add(first)
+    repository.add(Ingredient(first.id, "b", 2.0))
+    repository.add_many([Ingredient(first.id, "c", 3.0)])
+
+    assert [i.name for i in repository.query(Range("cost", 0, 10))] == ["a"]
+    assert repository.query(Eq("name", "b")) == []
+    repository.remove(first)
+    assert repository.query(Range("cost", 0, 10)) == []
+
+
+def test_scan_by_a_repeated_field_does_not_skip_ties():
+    ingredients = {Ingredient(uuid.uuid4(), f"i{n}", float(n % 3)) for n in range(300)}
+    repository = ConcurrentIngredientRepository(ingredients)
+
+    scanned = list(repository.scan(field="cost"))
+
+    # mas de un bloque de SCAN_CHUNK con el mismo coste
+    assert len(scanned) == 300
+    assert [i.cost for i in scanned] == sorted(i.cost for i in ingredients)
+
+
+def test_update_counts_from_the_stored_version():
+    first = Ingredient(uuid.uuid4(), "a", 1.0)
+    repository = ConcurrentIngredientRepository({first})
+    # cada update con una instancia nueva, que empieza en la version 0
+    repository.update(Ingredient(first.id, "b", 2.0))
+    repository.update(Ingredient(first.id, "c", 3.0))
+
+    assert repository.find(first.id).version == 2
+
+
+def test_a_nan_cost_is_rejected_before_touching_the_repository():
+    kept = Ingredient(uuid.uuid4(), "a", 1.0)
+    repository = ConcurrentIngredientRepository({kept})
+    nan = Ingredient(uuid.uuid4(), "b", float("nan"))
+
+    with pytest.raises(ValueError):
+        repository.add(nan)
+    with pytest.raises(ValueError):
+        repository.add_many([Ingredient(uuid.uuid4(), "c", 2.0), nan])
+    with pytest.raises(ValueError):
+        repository.update(Ingredient(kept.id, "a", float("nan")))
+
+    assert len(repository.data) == len(repository.index) == 1
+    assert repository.find(kept.id).cost == 1.0
+    repository.remove(kept)
+    assert repository.query(Range("cost", None, None)) == []
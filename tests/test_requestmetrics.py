@@ -0,0 +1,26 @@
+import time
+import pytest
+
+pytest.importorskip("flask")
+from flask import Flask  # noqa: E402
+from app.core.metrics import Registry  # noqa: E402
+from app.core.requestmetrics import metrics  # noqa: E402
+
+
+def test_a_streamed_response_is_timed_until_its_body_is_generated():
+    app = Flask(__name__)
+    registry = Registry()
+    metrics(app, registry)
+
+    @app.route("/stream")
+    def stream():
+        def body():
+            time.sleep(0.05)
+            yield "hecho\n"
+        return app.response_class(body())
+
+    with app.test_client().get("/stream") as response:
+        assert response.get_data() == b"hecho\n"
+    histogram = registry._histograms[("http_request_duration_seconds", (("endpoint", "stream"),))]
+    assert histogram.count == 1
+    assert histogram.sum >= 0.05
@@ -0,0 +1,66 @@
+import random
+import uuid
+import pytest
+from app.core import searchindex
+from app.core.searchindex import SearchIndex, scan_search
+from app.dominio.ingredient.ingredient import Ingredient
+
+
+def build(names):
+    # en orden de id, que es el orden en el que scan_search recorre
+    ingredients = sorted((Ingredient(uuid.uuid4(), name, 1.0) for name in names), key=lambda i: i.id)
+    index = SearchIndex("name")
+    index.add_many(ingredients)
+    return ingredients, index
+
+
+def names(ingredients, ids):
+    by_id = {i.id: i.name for i in ingredients}
+    return [by_id[id] for id in ids]
+
+
+def test_a_short_name_is_not_hidden_behind_many_longer_words():
+    ingredients, index = build([f"jamaica {n}" for n in range(300)] + ["jamon"])
+
+    found = index.search("jam", 5)
+    assert names(ingredients, found)[0] == "jamon"
+    assert found == [i.id for i in scan_search(ingredients, "jam", 5)]
+
+
+def test_every_query_word_narrows_the_candidates(monkeypatch):
+    # sin parecidos: lo tiene que encontrar el paso por prefijo
+    monkeypatch.setattr(searchindex, "MIN_SIMILARITY", 1.1)
+    ingredients, index = build([f"queso azul {n}" for n in range(500)] + ["queso manchego"])
+
+    assert names(ingredients, index.search("queso manchego", 3))[0] == "queso manchego"
+    # "queso" es tan largo como "manch" pero mucho menos selectivo
+    assert names(ingredients, index.search("queso manch", 3))[0] == "queso manchego"
+    assert names(ingredients, index.search("manch queso", 3)) == ["queso manchego"]
+
+
+@pytest.mark.parametrize("scored, max_runs", [(20_000, 64), (5, 64), (5, 1)])
+def test_prefix_results_match_scan_search(monkeypatch, scored, max_runs):
+    # con 5 se leen por longitud en vez de puntuar todos los candidatos:
+    # mezclando las palabras del prefijo o, con max_runs 1, todos los nombres
+    monkeypatch.setattr(searchindex, "SCORED", scored)
+    monkeypatch.setattr(searchindex, "MAX_CANDIDATES", scored)
+    monkeypatch.setattr(searchindex, "MAX_RUNS", max_runs)
+    rng = random.Random(7)
+    vocabulary = ["jamón", "jamaica", "queso", "que", "tomate", "tom", "azul", "serrano", "a", "ajo"]
+    catalog = {" ".join(rng.sample(vocabulary, rng.randint(1, 3))) for _ in range(400)}
+    ingredients, index = build(catalog | {"jamon", "queso"})
+
+    for query in ("jam", "que", "queso", "jamon s", "a", "to az", "Jamón", "ser q"):
+        expected = [i.id for i in scan_search(ingredients, query, 10)]
+        # el indice completa con parecidos cuando no hay bastantes prefijos
+        assert index.search(query, 10)[:len(expected)] == expected, query
+
+
+def test_removed_and_renamed_entities_leave_the_index():
+    ingredients, index = build(["tomate", "tomillo"])
+    index.remove(ingredients[0])
+    renamed = Ingredient(ingredients[1].id, "ajo", 1.0)
+    index.update(renamed)
+
+    assert index.search("tom") == []
+    assert index.search("ajo") == [renamed.id]
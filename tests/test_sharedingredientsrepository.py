@@ -0,0 +1,47 @@
+import uuid
+from itertools import islice
+import pytest
+from app.core.storagelimitexception import StorageLimitException
+from app.dominio.ingredient.ingredient import Ingredient
+import app.infraestructure.ingredients.sharedingredientsrepository as shared
+
+
+@pytest.fixture
+def repository():
+    repository = shared.SharedIngredientRepository(f"test-{uuid.uuid4().hex[:8]}", capacity=1000)
+    yield repository
+    repository.close()
+    repository.unlink()
+
+
+def test_scan_follows_id_order_from_the_cursor(repository):
+    # mas de BLOCK de uno en uno para que se partan bloques
+    ingredients = [Ingredient(uuid.uuid4(), f"ingrediente {i}", 1.0) for i in range(900)]
+    for ingredient in ingredients:
+        repository.add(ingredient)
+    for ingredient in ingredients[::3]:
+        repository.remove(ingredient)
+    ids = sorted(ingredient.id for ingredient in ingredients[1::3] + ingredients[2::3])
+
+    assert [e.id for e in repository.scan()] == ids
+    assert [e.id for e in islice(repository.scan(ids[50]), 5)] == ids[51:56]
+
+
+def test_reader_recovers_from_a_dead_writer(repository, monkeypatch):
+    monkeypatch.setattr(shared, "STALE_WRITER", 0.05)
+    ingredient = Ingredient(uuid.uuid4(), "Tomate", 1.0)
+    repository.add(ingredient)
+    # un escritor que muere despues de _begin deja seq impar y suelta el lock
+    repository._begin()
+
+    assert repository.find(ingredient.id).name == "Tomate"
+    assert repository._get(shared.SEQ) % 2 == 0
+
+
+def test_limits_are_storage_errors(repository):
+    with pytest.raises(StorageLimitException):
+        repository.add(Ingredient(uuid.uuid4(), "x" * 65, 1.0))
+    with pytest.raises(StorageLimitException) as error:
+        repository.add_many([Ingredient(uuid.uuid4(), "y", 1.0) for _ in range(1001)])
+    assert error.value.code == 507
+    assert len(repository) == 0
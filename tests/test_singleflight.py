@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.core.asyncrepository import AsyncRepository
+from app.core.metrics import Registry
+from app.core.notfoundexception import NotFoundException
+from app.core.singleflight import AsyncSingleFlightRepository, SingleFlight, SingleFlightRepository
+
+
+def coalesced(registry):
+    return registry._counters.get(
+        ("singleflight_calls_total", (("name", "test"), ("result", "coalesced"))), 0)
+
+
+def run_while_blocked(flight, registry, function, callers):
+    # el lider se queda en function hasta que los demas se han unido
+    release = threading.Event()
+    outcomes = [None] * callers
+
+    def blocked():
+        release.wait(5)
+        return function()
+
+    def call(i):
+        try:
+            outcomes[i] = flight.do("key", blocked)
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while coalesced(registry) < callers - 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def test_concurrent_calls_share_one_execution():
+    registry = Registry()
+    flight = SingleFlight("test", registry)
+    calls = []
+
+    outcomes = run_while_blocked(flight, registry, lambda: calls.append(1) or "tomate", 8)
+
+    assert calls == [1]
+    assert outcomes == ["tomate"] * 8
+    assert coalesced(registry) == 7
+
+
+def test_every_waiter_raises_its_own_copy_of_the_error():
+    registry = Registry()
+    flight = SingleFlight("test", registry)
+    leader_error = NotFoundException("no existe")
+
+    def fail():
+        raise leader_error
+
+    outcomes = run_while_blocked(flight, registry, fail, 4)
+
+    assert all(isinstance(e, NotFoundException) and e.message == "no existe" for e in outcomes)
+    assert len({id(e) for e in outcomes}) == 4
+    assert sum(e is leader_error for e in outcomes) == 1
+    assert all(e.__cause__ is leader_error for e in outcomes if e is not leader_error)
+
+
+def test_inline_async_finds_in_the_same_loop_are_coalesced():
+    class Repository:
+        finds = 0
+
+        def find(self, id, message="La entidad no existe"):
+            self.finds += 1
+            return id
+
+    repository = Repository()
+    registry = Registry()
+    flight = AsyncSingleFlightRepository(AsyncRepository(repository), SingleFlight("test", registry))
+
+    async def main():
+        return await asyncio.gather(*(flight.find("key") for _ in range(5)))
+
+    assert asyncio.run(main()) == ["key"] * 5
+    assert repository.finds == 1
+    assert coalesced(registry) == 4
+
+
+def test_the_sync_repository_passes_other_calls_through():
+    class Repository:
+        def find(self, id, message="La entidad no existe"):
+            raise NotFoundException(message)
+
+        def query(self, predicate, page=0, size=10):
+            return ["tomate"]
+
+    repository = SingleFlightRepository(Repository(), SingleFlight("test", Registry()))
+
+    with pytest.raises(NotFoundException):
+        repository.find("key")
+    assert repository.query(None) == ["tomate"]
@@ -0,0 +1,35 @@
+import threading
+import uuid
+from app.dominio.ingredient.ingredient import Ingredient
+from app.infraestructure.ingredients.sqliteingredientsrepository import (
+    SqliteIngredientRepository,
+)
+
+
+def test_threads_share_a_bounded_pool_of_connections(tmp_path):
+    repository = SqliteIngredientRepository(str(tmp_path / "ingredients.db"), pool_size=4)
+    ingredients = [Ingredient(uuid.uuid4(), f"ingrediente {i}", 1.0) for i in range(200)]
+    repository.add_many(ingredients)
+    errors = []
+
+    def work(chunk):
+        try:
+            for ingredient in chunk:
+                found = repository.find(ingredient.id)
+                repository.update(Ingredient(found.id, found.name, found.cost + 1))
+        except Exception as e:
+            errors.append(e)
+
+    # un hilo por "cliente", como el servidor con hilos de werkzeug
+    threads = [threading.Thread(target=work, args=(ingredients[i::20],)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert repository._opened <= 4
+    assert all(i.cost == 2.0 for i in repository.scan())
+    assert repository.add_many(ingredients[:10]) == 0
+    repository.close()
+    assert repository._opened == 0